@@ -3,15 +3,88 @@ AI-Based Energy Waste Detection Engine (CORRECTED LOGIC)
 Follows energy conservation rules - no double counting
 """
 
-from dataclasses import dataclass, field
-from typing import List, Dict, Any
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Any, Optional, Tuple, Iterable
 from datetime import datetime, time
 import pandas as pd
 import numpy as np
-from collections import defaultdict
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; classification falls back to NumPy masks
+    njit = None
 
-@dataclass
+# Devices that are expected to run 24/7 and are never flagged as waste
+ALWAYS_ON_CATEGORIES = ['fridge', 'freezer', 'server', 'security', 'router']
+
+# Low-cardinality label dtypes used by the analysis frame
+OCCUPANCY_DTYPE = pd.CategoricalDtype(categories=['occupied', 'unoccupied'])
+WASTE_CATEGORY_DTYPE = pd.CategoricalDtype(categories=['normal', 'phantom_load', 'unoccupied_usage', 'after_hours'])
+
+# Issue wording per waste type:
+# (title, time period, action, reason, daily cost threshold, severity above, severity at or below)
+ISSUE_TEMPLATES = {
+    'phantom_load': (
+        "Phantom Load: {category} Never Turns Off",
+        "24/7",
+        "Install smart plug to cut power when not in use",
+        "Device draws {power}W constantly, even when 'off'",
+        20, "medium", "low"
+    ),
+    'unoccupied_usage': (
+        "{category} Active When Space Unoccupied",
+        "During unoccupied periods",
+        "Connect to occupancy sensor for automatic control",
+        "Device uses {power}W when no one is present",
+        100, "critical", "high"
+    ),
+    'after_hours': (
+        "{category} Running After Hours",
+        "After {end_hour}:00 PM",
+        "Set timer to turn off at {end_hour}:00 PM",
+        "Consuming {power}W when building is empty",
+        50, "high", "medium"
+    )
+}
+
+
+def _classify_kernel(power, hour, occupancy, always_on, wide_margin, unoccupied_baseline,
+                     after_hours_baseline, phantom_threshold, start_hour, end_hour):
+    """Per-record priority classifier over raw arrays (codes follow WASTE_CATEGORY_DTYPE)"""
+    n = power.shape[0]
+    codes = np.zeros(n, dtype=np.int8)
+    expected = np.zeros(n, dtype=np.float32)
+    
+    for i in range(n):
+        if always_on[i]:
+            continue
+        
+        p = power[i]
+        unoccupied = occupancy[i] == 1
+        
+        # Priority 1: Phantom Load
+        if unoccupied and p > 0 and p <= phantom_threshold[i] * 3:
+            codes[i] = 1
+        # Priority 2: Unoccupied Usage
+        elif unoccupied and p > unoccupied_baseline[i] + (100 if wide_margin[i] else 50):
+            codes[i] = 2
+            expected[i] = unoccupied_baseline[i]
+        # Priority 3: After-Hours Usage
+        elif ((hour[i] < start_hour or hour[i] >= end_hour) and occupancy[i] != 0
+              and p > after_hours_baseline[i] + 100):
+            codes[i] = 3
+            expected[i] = after_hours_baseline[i]
+    
+    return codes, expected
+
+
+if njit is not None:
+    # Serial on purpose: a parallel kernel gains nothing at these sizes, and under the
+    # TBB threading layer it hangs interpreter exit once called off the main thread
+    _classify_kernel = njit(cache=True)(_classify_kernel)
+
+
+@dataclass(slots=True)
 class WasteIssue:
     """Represents a single energy waste issue"""
     title: str
@@ -25,7 +98,7 @@ class WasteIssue:
     severity: str
 
 
-@dataclass
+@dataclass(slots=True)
 class EnergyAnalysisReport:
     """Complete energy analysis report"""
     total_energy_kwh: float
@@ -47,6 +120,7 @@ class AIEnergyAnalyst:
     
     def __init__(self, cost_per_kwh: float = 8.0):
         self.cost_per_kwh = cost_per_kwh
+        self._cost_per_kwh_f32 = np.float32(cost_per_kwh)
         self.business_start = time(9, 0)
         self.business_end = time(18, 0)
         self.phantom_threshold = {
@@ -62,68 +136,154 @@ class AIEnergyAnalyst:
         if not readings:
             return self._empty_report()
         
-        df = pd.DataFrame([r if isinstance(r, dict) else r.to_dict() for r in readings])
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp')
-        df['duration_hours'] = 1.0
+        return self._analyze_frame(self._records_to_frame(readings))
+    
+    def warm_up(self) -> None:
+        """Run one synthetic reading through the analysis so the numba kernel is compiled up front"""
+        self.analyze_soa(
+            timestamp=np.array(['2024-01-01T00:00:00']),
+            device_id=np.array(['warmup']),
+            device_category=np.array(['default']),
+            power_w=np.array([0.0]),
+            occupancy_status=np.array(['unoccupied'])
+        )
+    
+    def analyze_stream(self, chunks: Iterable[List[Dict]]) -> EnergyAnalysisReport:
+        """
+        Analyze readings supplied as successive batches without holding them all in memory.
+        
+        `chunks` is iterated twice (once to learn baselines, once to classify), so it
+        must be re-iterable, e.g. a list of batches or an object whose __iter__ re-reads
+        the source. Only per-device running sums are kept between batches.
+        """
+        if iter(chunks) is chunks:
+            raise TypeError("analyze_stream needs a re-iterable of chunks, not a one-shot iterator")
+        
+        baselines = self._fit_baselines_streaming(chunks)
+        if not baselines:
+            return self._empty_report()
         
-        # Step 1: Calculate TOTAL ENERGY USED
+        total_energy_used = 0.0
+        total_wasted_energy = 0.0
+        totals = None
+        for chunk in chunks:
+            if not chunk:
+                continue
+            energy, wasted, chunk_totals = self._classify_chunk(self._records_to_frame(chunk), baselines)
+            total_energy_used += energy
+            total_wasted_energy += wasted
+            totals = chunk_totals if totals is None else (
+                pd.concat([totals, chunk_totals]).groupby(level=[0, 1], sort=False, observed=True).sum()
+            )
+        
+        # Safety check
+        if total_wasted_energy > total_energy_used:
+            scale_factor = total_energy_used * 0.95 / total_wasted_energy
+            totals['total_wasted_kwh'] *= scale_factor
+            total_wasted_energy *= scale_factor
+        
+        issues = self._generate_issues_from_totals(totals, baselines)
+        return self._build_report(total_energy_used, total_wasted_energy, issues)
+    
+    def _records_to_frame(self, readings: List[Dict]) -> pd.DataFrame:
+        """Build a raw frame from reading dicts (or objects exposing to_dict)"""
+        if all(isinstance(r, dict) for r in readings):
+            return pd.DataFrame.from_records(readings)
+        return pd.DataFrame.from_records([r if isinstance(r, dict) else r.to_dict() for r in readings])
+    
+    def analyze_soa(self, timestamp: np.ndarray, device_id: np.ndarray, device_category: np.ndarray,
+                    power_w: np.ndarray, occupancy_status: np.ndarray,
+                    location_floor: Optional[np.ndarray] = None,
+                    location_zone: Optional[np.ndarray] = None) -> EnergyAnalysisReport:
+        """
+        Analyze readings supplied as parallel column arrays (one entry per reading).
+        
+        Skips the per-reading dicts entirely; the arrays are wrapped into the
+        analysis frame without copying.
+        """
+        if len(power_w) == 0:
+            return self._empty_report()
+        
+        df = pd.DataFrame({
+            'timestamp': timestamp,
+            'device_id': device_id,
+            'device_category': device_category,
+            'location_floor': location_floor,
+            'location_zone': location_zone,
+            'power_w': power_w,
+            'occupancy_status': occupancy_status
+        }, copy=False)
+        
+        return self._analyze_frame(df)
+    
+    def _prepare_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Normalise column dtypes and derive the per-record fields used by the analysis"""
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+        df['hour'] = df['timestamp'].dt.hour.astype('int8')
+        df['power_w'] = df['power_w'].astype('float32')
+        for col in ['device_id', 'device_category', 'location_floor', 'location_zone']:
+            df[col] = df[col].astype('category')
+        df['occupancy_status'] = df['occupancy_status'].astype(OCCUPANCY_DTYPE)
+        df['duration_hours'] = np.float32(1.0)
         df['energy_kwh'] = (df['power_w'] / 1000.0) * df['duration_hours']
+        return df
+    
+    def _analyze_frame(self, df: pd.DataFrame) -> EnergyAnalysisReport:
+        """Run the analysis on a frame with one row per reading"""
+        df = self._prepare_frame(df)
+        
+        # Step 1: Calculate TOTAL ENERGY USED
         total_energy_used = df['energy_kwh'].sum()
         
         # Step 2: Learn baselines
         baselines = self._learn_baselines(df)
         
         # Step 3: Classify each record (PRIORITY-BASED, NO OVERLAP)
-        df['waste_category'] = 'normal'
-        df['expected_baseline_w'] = 0.0
-        df['excess_power_w'] = 0.0
-        df['wasted_energy_kwh'] = 0.0
-        
-        for idx, row in df.iterrows():
-            device_id = row['device_id']
-            baseline = baselines.get(device_id, {})
-            
-            # Priority 1: Phantom Load
-            if self._is_phantom_load(row, baseline):
-                df.at[idx, 'waste_category'] = 'phantom_load'
-                df.at[idx, 'expected_baseline_w'] = 0.0
-                df.at[idx, 'excess_power_w'] = row['power_w']
-                df.at[idx, 'wasted_energy_kwh'] = (row['power_w'] / 1000.0) * row['duration_hours']
-                continue
-            
-            # Priority 2: Unoccupied Usage
-            if self._is_unoccupied_usage(row, baseline):
-                expected = baseline.get('unoccupied_baseline', 0)
-                df.at[idx, 'waste_category'] = 'unoccupied_usage'
-                df.at[idx, 'expected_baseline_w'] = expected
-                df.at[idx, 'excess_power_w'] = max(0, row['power_w'] - expected)
-                df.at[idx, 'wasted_energy_kwh'] = (df.at[idx, 'excess_power_w'] / 1000.0) * row['duration_hours']
-                continue
-            
-            # Priority 3: After-Hours Usage
-            if self._is_after_hours(row, baseline):
-                expected = baseline.get('after_hours_baseline', 0)
-                df.at[idx, 'waste_category'] = 'after_hours'
-                df.at[idx, 'expected_baseline_w'] = expected
-                df.at[idx, 'excess_power_w'] = max(0, row['power_w'] - expected)
-                df.at[idx, 'wasted_energy_kwh'] = (df.at[idx, 'excess_power_w'] / 1000.0) * row['duration_hours']
-                continue
+        self._classify_frame(df, baselines)
         
         # Step 4: Calculate TOTAL WASTED ENERGY
         total_wasted_energy = df['wasted_energy_kwh'].sum()
         
         # Safety check
         if total_wasted_energy > total_energy_used:
-            scale_factor = total_energy_used * 0.95 / total_wasted_energy
-            df['wasted_energy_kwh'] = df['wasted_energy_kwh'] * scale_factor
-            total_wasted_energy = df['wasted_energy_kwh'].sum()
+            # Rescale the column buffer in place; only this branch needs a re-sum
+            wasted = df['wasted_energy_kwh'].to_numpy()
+            wasted *= total_energy_used * 0.95 / total_wasted_energy
+            total_wasted_energy = wasted.sum()
         
         # Step 5: Generate issues
-        issues = self._generate_issues_from_classified_data(df, baselines)
+        issues = self._generate_issues_from_totals(self._waste_totals(df), baselines)
         
+        return self._build_report(total_energy_used, total_wasted_energy, issues)
+    
+    def _classify_frame(self, df: pd.DataFrame, baselines: Dict[str, Dict]) -> None:
+        """Attach waste category, expected baseline, excess power and wasted energy columns"""
+        limits = self._align_device_limits(df, baselines)
+        codes, expected = self._classify_records(df, limits)
+        
+        # Derived columns are computed into float32 buffers and attached once
+        excess = df['power_w'].to_numpy() - expected
+        np.maximum(excess, 0, out=excess)
+        excess[codes == 0] = 0
+        wasted = excess / np.float32(1000.0)
+        wasted *= df['duration_hours'].to_numpy()
+        
+        df['waste_category'] = pd.Categorical.from_codes(codes, dtype=WASTE_CATEGORY_DTYPE)
+        df['expected_baseline_w'] = expected
+        df['excess_power_w'] = excess
+        df['wasted_energy_kwh'] = wasted
+    
+    def _classify_chunk(self, chunk: pd.DataFrame, baselines: Dict[str, Dict]) -> Tuple[float, float, pd.DataFrame]:
+        """Classify one batch against fixed baselines, returning its energy, waste and per-device totals"""
+        chunk = self._prepare_frame(chunk)
+        self._classify_frame(chunk, baselines)
+        return float(chunk['energy_kwh'].sum()), float(chunk['wasted_energy_kwh'].sum()), self._waste_totals(chunk)
+    
+    def _build_report(self, total_energy_used: float, total_wasted_energy: float,
+                      issues: List[WasteIssue]) -> EnergyAnalysisReport:
+        """Turn energy totals and issues into the final report"""
         # Step 6: Calculate costs
-        daily_loss = total_wasted_energy * self.cost_per_kwh
+        daily_loss = float(total_wasted_energy * self._cost_per_kwh_f32)
         monthly_loss = daily_loss * 30
         yearly_loss = daily_loss * 365
         
@@ -139,159 +299,226 @@ class AIEnergyAnalyst:
         issues.sort(key=lambda x: x.cost_per_day, reverse=True)
         
         return EnergyAnalysisReport(
-            total_energy_kwh=round(total_energy_used, 2),
-            energy_wasted_kwh=round(total_wasted_energy, 2),
-            money_lost_today=round(daily_loss, 2),
-            monthly_savings_potential=round(monthly_loss, 2),
+            total_energy_kwh=round(float(total_energy_used), 2),
+            energy_wasted_kwh=round(float(total_wasted_energy), 2),
+            money_lost_today=round(float(daily_loss), 2),
+            monthly_savings_potential=round(float(monthly_loss), 2),
             efficiency_score=efficiency_score,
             issues=issues,
-            daily_loss=round(daily_loss, 2),
-            monthly_loss=round(monthly_loss, 2),
-            yearly_loss=round(yearly_loss, 0),
+            daily_loss=round(float(daily_loss), 2),
+            monthly_loss=round(float(monthly_loss), 2),
+            yearly_loss=round(float(yearly_loss), 0),
             automation_rules=automation_rules,
             main_waste_source=main_waste_source
         )
     
     def _learn_baselines(self, df: pd.DataFrame) -> Dict[str, Dict]:
         """Learn normal behavior for each device"""
-        baselines = {}
-        
-        for device_id in df['device_id'].unique():
-            device_df = df[df['device_id'] == device_id]
-            category = device_df['device_category'].iloc[0]
-            
-            occupied_data = device_df[device_df['occupancy_status'] == 'occupied']
-            unoccupied_data = device_df[device_df['occupancy_status'] == 'unoccupied']
-            
-            occupied_baseline = occupied_data['power_w'].mean() if len(occupied_data) > 0 else device_df['power_w'].mean()
-            
-            # For unoccupied baseline, use 10% of occupied for HVAC/lighting, 0 for others
-            if category.lower() in ['hvac', 'lighting']:
-                unoccupied_baseline = unoccupied_data['power_w'].mean()
-            else:
-                unoccupied_baseline = 0
+        stats = df.groupby('device_id', sort=False, observed=True).agg(
+            avg_power=('power_w', 'mean'),
+            max_power=('power_w', 'max'),
+            min_power=('power_w', 'min'),
+            category=('device_category', 'first'),
+            floor=('location_floor', 'first'),
+            zone=('location_zone', 'first')
+        )
+        occupancy_means = (
+            df.groupby(['device_id', 'occupancy_status'], sort=False, observed=True)['power_w'].mean()
+            .unstack('occupancy_status')
+            .reindex(index=stats.index, columns=['occupied', 'unoccupied'])
+        )
+        return self._finalize_baselines(stats, occupancy_means)
+    
+    def _fit_baselines_streaming(self, chunks: Iterable[List[Dict]]) -> Dict[str, Dict]:
+        """Learn the same baselines as _learn_baselines from running per-device sums over batches"""
+        acc = None
+        for chunk in chunks:
+            if not chunk:
+                continue
+            df = self._prepare_frame(self._records_to_frame(chunk))
+            part = df.groupby('device_id', sort=False, observed=True).agg(
+                power_sum=('power_w', 'sum'),
+                count=('power_w', 'count'),
+                max_power=('power_w', 'max'),
+                min_power=('power_w', 'min'),
+                category=('device_category', 'first'),
+                floor=('location_floor', 'first'),
+                zone=('location_zone', 'first')
+            )
+            occupancy = (
+                df.groupby(['device_id', 'occupancy_status'], sort=False, observed=True)['power_w']
+                .agg(['sum', 'count'])
+                .unstack('occupancy_status')
+                .reindex(index=part.index, columns=pd.MultiIndex.from_product(
+                    [['sum', 'count'], ['occupied', 'unoccupied']]), fill_value=0)
+            )
+            occupancy.columns = [f'{status}_{stat}' for stat, status in occupancy.columns]
+            part = part.astype({'category': object, 'floor': object, 'zone': object}).join(occupancy)
+            part.index = part.index.astype(object)
             
-            baselines[device_id] = {
-                'avg_power': device_df['power_w'].mean(),
-                'max_power': device_df['power_w'].max(),
-                'min_power': device_df['power_w'].min(),
-                'occupied_baseline': occupied_baseline,
-                'unoccupied_baseline': unoccupied_baseline,
-                'after_hours_baseline': unoccupied_baseline,
-                'category': category,
-                'location': f"{device_df['location_floor'].iloc[0] or 'Unknown Floor'}, {device_df['location_zone'].iloc[0] or 'Unknown Zone'}"
-            }
-        
-        return baselines
+            acc = part if acc is None else pd.concat([acc, part]).groupby(level=0, sort=False).agg({
+                'power_sum': 'sum', 'count': 'sum', 'max_power': 'max', 'min_power': 'min',
+                'category': 'first', 'floor': 'first', 'zone': 'first',
+                'occupied_sum': 'sum', 'occupied_count': 'sum',
+                'unoccupied_sum': 'sum', 'unoccupied_count': 'sum'
+            })
+        
+        if acc is None:
+            return {}
+        
+        stats = acc[['max_power', 'min_power', 'category', 'floor', 'zone']].copy()
+        stats.insert(0, 'avg_power', acc['power_sum'] / acc['count'])
+        occupancy_means = pd.DataFrame({
+            status: acc[f'{status}_sum'] / acc[f'{status}_count'].where(acc[f'{status}_count'] > 0)
+            for status in ['occupied', 'unoccupied']
+        })
+        return self._finalize_baselines(stats, occupancy_means)
     
-    def _is_phantom_load(self, row: pd.Series, baseline: Dict) -> bool:
-        """Check if record is phantom load"""
-        category = baseline.get('category', '').lower()
-        
-        if category in ['fridge', 'freezer', 'server', 'security', 'router']:
-            return False
+    def _finalize_baselines(self, stats: pd.DataFrame, occupancy_means: pd.DataFrame) -> Dict[str, Dict]:
+        """Derive expected baselines and locations from per-device power statistics"""
+        stats['occupied_baseline'] = occupancy_means['occupied'].fillna(stats['avg_power'])
         
-        if row['occupancy_status'] == 'unoccupied':
-            threshold = self.phantom_threshold.get(category, self.phantom_threshold['default'])
-            # Phantom load: constant low power that should be zero
-            if row['power_w'] > 0 and row['power_w'] <= threshold * 3:
-                return True
+        # For unoccupied baseline, use 10% of occupied for HVAC/lighting, 0 for others
+        stats['unoccupied_baseline'] = occupancy_means['unoccupied'].where(
+            stats['category'].str.lower().isin(['hvac', 'lighting']), 0
+        )
+        stats['after_hours_baseline'] = stats['unoccupied_baseline']
+        
+        # Missing or empty labels fall back to the 'Unknown ...' placeholders
+        floor = stats['floor'].astype(object)
+        zone = stats['zone'].astype(object)
+        stats['location'] = (
+            floor.where(floor.notna() & (floor != ''), 'Unknown Floor').astype(str)
+            + ', '
+            + zone.where(zone.notna() & (zone != ''), 'Unknown Zone').astype(str)
+        )
         
-        return False
+        return stats.drop(columns=['floor', 'zone']).to_dict('index')
     
-    def _is_unoccupied_usage(self, row: pd.Series, baseline: Dict) -> bool:
-        """Check if high usage when unoccupied"""
-        category = baseline.get('category', '').lower()
+    def _align_device_limits(self, df: pd.DataFrame, baselines: Dict[str, Dict]) -> pd.DataFrame:
+        """Resolve per-device classification limits once and align them with every record"""
+        devices = pd.DataFrame.from_dict(baselines, orient='index')
+        category = devices['category'].str.lower()
         
-        if category in ['fridge', 'freezer', 'server', 'security', 'router']:
-            return False
-        
-        if row['occupancy_status'] == 'unoccupied':
+        limits = pd.DataFrame({
+            'always_on': category.isin(ALWAYS_ON_CATEGORIES),
             # For HVAC and lighting, any significant power when unoccupied is waste
-            if category in ['hvac', 'lighting']:
-                expected = baseline.get('unoccupied_baseline', 0)
-                if row['power_w'] > expected + 100:  # More than expected + 100W
-                    return True
-            else:
-                expected = baseline.get('unoccupied_baseline', 0)
-                if row['power_w'] > expected + 50:
-                    return True
-        
-        return False
+            'wide_margin': category.isin(['hvac', 'lighting']),
+            'phantom_threshold': category.map(self.phantom_threshold).fillna(self.phantom_threshold['default']),
+            'unoccupied_baseline': devices['unoccupied_baseline'],
+            'after_hours_baseline': devices['after_hours_baseline']
+        }).reindex(df['device_id'].cat.categories)
+        
+        rows = df['device_id'].cat.codes.to_numpy()
+        return pd.DataFrame({
+            'always_on': limits['always_on'].to_numpy(dtype=bool)[rows],
+            'wide_margin': limits['wide_margin'].to_numpy(dtype=bool)[rows],
+            'phantom_threshold': limits['phantom_threshold'].to_numpy(dtype=np.float32)[rows],
+            'unoccupied_baseline': limits['unoccupied_baseline'].to_numpy(dtype=np.float32)[rows],
+            'after_hours_baseline': limits['after_hours_baseline'].to_numpy(dtype=np.float32)[rows]
+        }, index=df.index)
     
-    def _is_after_hours(self, row: pd.Series, baseline: Dict) -> bool:
-        """Check if after business hours"""
-        category = baseline.get('category', '').lower()
-        
-        if category in ['fridge', 'freezer', 'server', 'security', 'router']:
-            return False
-        
-        hour = row['timestamp'].hour
-        is_after_hours = (hour < self.business_start.hour) or (hour >= self.business_end.hour)
-        
-        if is_after_hours and row['occupancy_status'] != 'occupied':
-            expected = baseline.get('after_hours_baseline', 0)
-            if row['power_w'] > expected + 100:
-                return True
-        
-        return False
+    def _classify_records(self, df: pd.DataFrame, limits: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Classify every record, returning waste category codes and expected baselines"""
+        if njit is not None:
+            return _classify_kernel(
+                df['power_w'].to_numpy(),
+                df['hour'].to_numpy(),
+                df['occupancy_status'].cat.codes.to_numpy(),
+                limits['always_on'].to_numpy(),
+                limits['wide_margin'].to_numpy(),
+                limits['unoccupied_baseline'].to_numpy(),
+                limits['after_hours_baseline'].to_numpy(),
+                limits['phantom_threshold'].to_numpy(),
+                self.business_start.hour,
+                self.business_end.hour
+            )
+        
+        # Priority 1: Phantom Load, 2: Unoccupied Usage, 3: After-Hours Usage
+        conditions = [
+            self._is_phantom_load(df, limits),
+            self._is_unoccupied_usage(df, limits),
+            self._is_after_hours(df, limits)
+        ]
+        codes = np.select(conditions, [1, 2, 3], default=0).astype(np.int8)
+        expected = np.select(conditions, [0.0, limits['unoccupied_baseline'], limits['after_hours_baseline']], default=0.0)
+        return codes, expected.astype(np.float32)
     
-    def _generate_issues_from_classified_data(self, df: pd.DataFrame, baselines: Dict) -> List[WasteIssue]:
-        """Generate issues from classified waste records"""
-        issues = []
-        waste_df = df[df['waste_category'] != 'normal']
-        
-        for device_id in waste_df['device_id'].unique():
-            device_waste = waste_df[waste_df['device_id'] == device_id]
-            baseline = baselines.get(device_id, {})
-            
-            for waste_type in device_waste['waste_category'].unique():
-                type_waste = device_waste[device_waste['waste_category'] == waste_type]
-                
-                total_wasted_kwh = type_waste['wasted_energy_kwh'].sum()
-                avg_excess_power = type_waste['excess_power_w'].mean()
-                cost_per_day = total_wasted_kwh * self.cost_per_kwh
-                
-                if waste_type == 'phantom_load':
-                    issues.append(WasteIssue(
-                        title=f"Phantom Load: {baseline['category'].upper()} Never Turns Off",
-                        location=baseline['location'],
-                        device=device_id,
-                        time_period="24/7",
-                        extra_energy_kwh=round(total_wasted_kwh, 2),
-                        cost_per_day=round(cost_per_day, 2),
-                        action=f"Install smart plug to cut power when not in use",
-                        reason=f"Device draws {int(avg_excess_power)}W constantly, even when 'off'",
-                        severity="medium" if cost_per_day > 20 else "low"
-                    ))
-                
-                elif waste_type == 'unoccupied_usage':
-                    issues.append(WasteIssue(
-                        title=f"{baseline['category'].upper()} Active When Space Unoccupied",
-                        location=baseline['location'],
-                        device=device_id,
-                        time_period="During unoccupied periods",
-                        extra_energy_kwh=round(total_wasted_kwh, 2),
-                        cost_per_day=round(cost_per_day, 2),
-                        action=f"Connect to occupancy sensor for automatic control",
-                        reason=f"Device uses {int(avg_excess_power)}W when no one is present",
-                        severity="critical" if cost_per_day > 100 else "high"
-                    ))
-                
-                elif waste_type == 'after_hours':
-                    issues.append(WasteIssue(
-                        title=f"{baseline['category'].upper()} Running After Hours",
-                        location=baseline['location'],
-                        device=device_id,
-                        time_period=f"After {self.business_end.hour}:00 PM",
-                        extra_energy_kwh=round(total_wasted_kwh, 2),
-                        cost_per_day=round(cost_per_day, 2),
-                        action=f"Set timer to turn off at {self.business_end.hour}:00 PM",
-                        reason=f"Consuming {int(avg_excess_power)}W when building is empty",
-                        severity="high" if cost_per_day > 50 else "medium"
-                    ))
-        
-        return issues
+    def _is_phantom_load(self, df: pd.DataFrame, limits: pd.DataFrame) -> pd.Series:
+        """Mask records that are phantom load"""
+        # Phantom load: constant low power that should be zero
+        return (
+            ~limits['always_on']
+            & (df['occupancy_status'] == 'unoccupied')
+            & (df['power_w'] > 0)
+            & (df['power_w'] <= limits['phantom_threshold'] * 3)
+        )
+    
+    def _is_unoccupied_usage(self, df: pd.DataFrame, limits: pd.DataFrame) -> pd.Series:
+        """Mask records with high usage when unoccupied"""
+        margin = np.where(limits['wide_margin'], 100, 50)
+        
+        return (
+            ~limits['always_on']
+            & (df['occupancy_status'] == 'unoccupied')
+            & (df['power_w'] > limits['unoccupied_baseline'] + margin)  # More than expected + margin
+        )
+    
+    def _is_after_hours(self, df: pd.DataFrame, limits: pd.DataFrame) -> pd.Series:
+        """Mask records after business hours"""
+        is_after_hours = (df['hour'] < self.business_start.hour) | (df['hour'] >= self.business_end.hour)
+        
+        return (
+            ~limits['always_on']
+            & is_after_hours
+            & (df['occupancy_status'] != 'occupied')
+            & (df['power_w'] > limits['after_hours_baseline'] + 100)
+        )
+    
+    def _waste_totals(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Sum wasted energy and excess power per (device, waste category), excluding normal records"""
+        waste = df[df['waste_category'] != 'normal']
+        return waste.groupby(['device_id', 'waste_category'], sort=False, observed=True).agg(
+            total_wasted_kwh=('wasted_energy_kwh', 'sum'),
+            excess_power_sum=('excess_power_w', 'sum'),
+            records=('excess_power_w', 'count')
+        )
+    
+    def _generate_issues_from_totals(self, totals: pd.DataFrame, baselines: Dict) -> List[WasteIssue]:
+        """Generate issues from per-device waste totals"""
+        totals = pd.DataFrame({
+            'total_wasted_kwh': totals['total_wasted_kwh'],
+            'avg_excess_power': totals['excess_power_sum'] / totals['records'],
+            'cost_per_day': totals['total_wasted_kwh'] * self._cost_per_kwh_f32
+        }).reset_index()
+        
+        return [
+            self._build_issue(ISSUE_TEMPLATES[waste_type], device_id, baselines[device_id],
+                              float(total_wasted_kwh), float(avg_excess_power), float(cost_per_day))
+            for device_id, waste_type, total_wasted_kwh, avg_excess_power, cost_per_day
+            in totals.itertuples(index=False)
+        ]
+    
+    def _build_issue(self, template: Tuple, device_id: str, baseline: Dict,
+                     total_wasted_kwh: float, avg_excess_power: float, cost_per_day: float) -> WasteIssue:
+        """Fill an ISSUE_TEMPLATES entry for one device"""
+        title, time_period, action, reason, threshold, severity_above, severity_below = template
+        labels = {
+            'category': baseline['category'].upper(),
+            'power': int(avg_excess_power),
+            'end_hour': self.business_end.hour
+        }
+        return WasteIssue(
+            title=title.format(**labels),
+            location=baseline['location'],
+            device=device_id,
+            time_period=time_period.format(**labels),
+            extra_energy_kwh=round(total_wasted_kwh, 2),
+            cost_per_day=round(cost_per_day, 2),
+            action=action.format(**labels),
+            reason=reason.format(**labels),
+            severity=severity_above if cost_per_day > threshold else severity_below
+        )
     
     def _calculate_efficiency_score(self, total_energy: float, wasted_energy: float) -> int:
         """Calculate efficiency score (0-100)"""
@@ -326,24 +553,25 @@ class AIEnergyAnalyst:
         if not issues:
             return "No significant energy waste detected. System is operating efficiently."
         
-        category_costs = defaultdict(float)
-        for issue in issues:
-            if "HVAC" in issue.title:
-                category_costs["HVAC"] += issue.cost_per_day
-            elif "Lighting" in issue.title or "LIGHTING" in issue.title:
-                category_costs["Lighting"] += issue.cost_per_day
-            elif "Phantom" in issue.title:
-                category_costs["Phantom Loads"] += issue.cost_per_day
-            else:
-                category_costs["Other Devices"] += issue.cost_per_day
-        
-        if not category_costs:
-            return "Energy waste detected across multiple device categories."
+        costs = pd.DataFrame({
+            'title': [issue.title for issue in issues],
+            'cost': [issue.cost_per_day for issue in issues]
+        })
+        costs['bucket'] = np.select(
+            [
+                costs['title'].str.contains('HVAC', regex=False),
+                costs['title'].str.contains('Lighting|LIGHTING'),
+                costs['title'].str.contains('Phantom', regex=False)
+            ],
+            ['HVAC', 'Lighting', 'Phantom Loads'],
+            default='Other Devices'
+        )
+        category_costs = costs.groupby('bucket', sort=False)['cost'].sum()
         
-        main_source = max(category_costs.items(), key=lambda x: x[1])
-        percentage = (main_source[1] / sum(category_costs.values())) * 100
+        main_source = category_costs.idxmax()
+        percentage = (category_costs[main_source] / category_costs.sum()) * 100
         
-        return f"Most waste comes from {main_source[0]} ({int(percentage)}% of total waste)"
+        return f"Most waste comes from {main_source} ({int(percentage)}% of total waste)"
     
     def _empty_report(self) -> EnergyAnalysisReport:
         """Return empty report when no data"""
@@ -371,20 +599,7 @@ class AIEnergyAnalyst:
                 "monthly_savings_potential": report.monthly_savings_potential,
                 "efficiency_score": report.efficiency_score
             },
-            "issues": [
-                {
-                    "title": issue.title,
-                    "location": issue.location,
-                    "device": issue.device,
-                    "time_period": issue.time_period,
-                    "extra_energy_kwh": issue.extra_energy_kwh,
-                    "cost_per_day": issue.cost_per_day,
-                    "action": issue.action,
-                    "reason": issue.reason,
-                    "severity": issue.severity
-                }
-                for issue in report.issues
-            ],
+            "issues": [asdict(issue) for issue in report.issues],
             "cost_savings": {
                 "daily_loss": report.daily_loss,
                 "monthly_loss": report.monthly_loss,
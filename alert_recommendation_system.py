@@ -14,32 +14,191 @@ RESPONSIBILITIES:
 """
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple
+from collections import defaultdict
+from functools import lru_cache
+from itertools import count, islice
+from typing import List, Dict, Optional, Tuple, Sequence, Any, BinaryIO, Iterator
 from datetime import datetime, timedelta
-from enum import Enum
+from enum import IntEnum
 import json
+import sys
+import time
+import numpy as np
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; to_json falls back to the stdlib encoder
+    orjson = None
 
-class AlertSeverity(str, Enum):
-    """Alert priority levels"""
-    INFO = "info"
-    LOW = "low"  
-    MEDIUM = "medium"
-    HIGH = "high"
-    CRITICAL = "critical"
 
+def format_timestamp_ns(timestamp_ns: int) -> str:
+    """Local-time ISO 8601 string for an integer Unix-nanosecond timestamp"""
+    seconds, nanos = divmod(timestamp_ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=nanos // 1000).isoformat()
 
-class RecommendationType(str, Enum):
+
+def _dumps(payload: Any) -> bytes:
+    """Encode a to_dict() payload as UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+class AlertSeverity(IntEnum):
+    """Alert priority levels (ordered, so severities compare directly)"""
+    INFO = 0
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+    CRITICAL = 4
+
+
+# JSON name of each severity, indexed by ordinal
+SEVERITY_NAMES = tuple(severity.name.lower() for severity in AlertSeverity)
+
+# Risk level reported by the reasoning engine -> alert severity (unknown levels map to MEDIUM)
+RISK_SEVERITY = {
+    'critical': AlertSeverity.CRITICAL,
+    'high': AlertSeverity.HIGH,
+    'medium': AlertSeverity.MEDIUM,
+    'low': AlertSeverity.LOW
+}
+
+# Human-readable alert title per waste type
+ALERT_TITLES = {
+    'phantom_load': "Phantom Load: {category} consuming power 24/7",
+    'post_occupancy': "Post-Occupancy Waste: {category} left on after hours",
+    'inefficient_usage': "Inefficient Usage: {category} running suboptimally",
+    'normal': "Notice: {category} operating normally"
+}
+
+
+@lru_cache(maxsize=512)
+def _alert_title(waste_type: str, device_category: str) -> str:
+    """Format the alert title for a (waste type, device category) pair"""
+    template = ALERT_TITLES.get(waste_type)
+    if template is None:
+        return f"Energy Waste: {waste_type}"
+    return template.format(category=device_category)
+
+
+class RecommendationType(IntEnum):
     """Types of recommendations"""
-    AUTOMATION = "automation"  # Install smart controller
-    SCHEDULING = "scheduling"  # Change schedule/settings
-    MAINTENANCE = "maintenance"  # Fix leaking/broken equipment
-    BEHAVIOR = "behavior"  # User behavior change
-    REPLACEMENT = "replacement"  # Replace with efficient model
-    MONITORING = "monitoring"  # Install monitoring to confirm issue
+    AUTOMATION = 0  # Install smart controller
+    SCHEDULING = 1  # Change schedule/settings
+    MAINTENANCE = 2  # Fix leaking/broken equipment
+    BEHAVIOR = 3  # User behavior change
+    REPLACEMENT = 4  # Replace with efficient model
+    MONITORING = 5  # Install monitoring to confirm issue
 
 
-@dataclass
+# JSON name of each recommendation type, indexed by ordinal
+RECOMMENDATION_TYPE_NAMES = tuple(t.name.lower() for t in RecommendationType)
+
+
+# Recommendations per waste type. 'savings_factor' scales the alert's annual cost,
+# a 'priority' of None inherits the alert severity, and 'fields' are passed through as-is.
+RECOMMENDATION_TEMPLATES: Dict[str, List[Dict]] = {
+    'phantom_load': [
+        {
+            # Recommend smart outlet/power strip
+            'savings_factor': 0.85,
+            'priority': None,
+            'steps': (
+                "Identify device and power outlet location",
+                "Procure smart multi-outlet power strip (₹500-1000)",
+                "Install and configure schedule (off during off-hours)",
+                "Test functionality and confirm power drops to ~2W"
+            ),
+            'fields': dict(
+                type=RecommendationType.AUTOMATION,
+                title="Install Smart Power Strip",
+                description="Smart outlet with motion sensor and schedule timer to eliminate phantom load.",
+                implementation_cost_inr=800,
+                payback_period_months=0.5,
+                confidence_percent=92,
+                responsible_team="operations",
+                estimated_implementation_days=1,
+                required_uptime_impact="none",
+                urgency="high"
+            )
+        },
+        {
+            # Recommend monitoring
+            'savings_factor': 0.05,  # Just from visibility
+            'priority': AlertSeverity.MEDIUM,
+            'steps': (
+                "Install smart meter on target circuit",
+                "Configure alerts in building management system",
+                "Monthly review of consumption trends"
+            ),
+            'fields': dict(
+                type=RecommendationType.MONITORING,
+                title="Install Power Monitoring",
+                description="Add sub-metering to track actual consumption and validate savings.",
+                implementation_cost_inr=1200,
+                payback_period_months=24,
+                confidence_percent=70,
+                responsible_team="maintenance",
+                estimated_implementation_days=3,
+                required_uptime_impact="minor",
+                urgency="normal"
+            )
+        }
+    ],
+    'post_occupancy': [
+        {
+            # Recommend occupancy-based automation
+            'savings_factor': 0.75,
+            'priority': None,
+            'steps': (
+                "Install PIR occupancy sensor near main entry",
+                "Connect to smart relay/contactor for device",
+                "Configure grace period (15-30 min after last motion)",
+                "Test multiple occupancy/departure scenarios"
+            ),
+            'fields': dict(
+                type=RecommendationType.AUTOMATION,
+                title="Install Occupancy-Based Controller",
+                description="Smart controller combining occupancy sensor + timer to auto-shutdown device after occupants leave.",
+                implementation_cost_inr=2500,
+                payback_period_months=3,
+                confidence_percent=88,
+                responsible_team="maintenance",
+                estimated_implementation_days=2,
+                required_uptime_impact="minor",
+                urgency="high"
+            )
+        }
+    ]
+}
+
+# Low-cost behavior change, recommended for every alert
+BEHAVIOR_RECOMMENDATION: Dict = {
+    'savings_factor': 0.15,
+    'priority': AlertSeverity.LOW,
+    'steps': (
+        "Send email reminder to building occupants",
+        "Post reminder signage near device",
+        "Include in next facility briefing",
+        "Monthly reminder emails"
+    ),
+    'fields': dict(
+        type=RecommendationType.BEHAVIOR,
+        title="Occupant Awareness Campaign",
+        description="Low-cost behavior change through signage and email reminders about turning off equipment.",
+        implementation_cost_inr=100,
+        payback_period_months=0.1,
+        confidence_percent=40,
+        responsible_team="operations",
+        estimated_implementation_days=1,
+        required_uptime_impact="none",
+        urgency="low"
+    )
+}
+
+
+@dataclass(slots=True)
 class Alert:
     """Generated alert for viewing by facility manager"""
     alert_id: str
@@ -59,8 +218,8 @@ class Alert:
     # Context
     waste_type: str  # "phantom_load", "post_occupancy", etc.
     pattern_frequency: str  # "one-time", "daily", "weekly", "recurring"
-    first_detected: datetime
-    last_detected: datetime
+    first_detected: int  # Unix nanoseconds, like every alert/recommendation timestamp
+    last_detected: int
     detection_count: int  # How many times this alert was triggered
     
     # Explainability
@@ -75,14 +234,31 @@ class Alert:
     # Related recommendations
     recommendation_ids: List[str] = field(default_factory=list)
     
-    created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
+    created_at: int = field(default_factory=time.time_ns)
+    updated_at: int = field(default_factory=time.time_ns)
+    
+    # Last to_dict() output and the mutable state it was built from
+    _cached_dict: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
+    _cached_state: Optional[Tuple] = field(default=None, init=False, repr=False, compare=False)
     
     def to_dict(self) -> Dict:
-        """Convert to JSON-serializable dict"""
+        """Convert to JSON-serializable dict (cached until a mutable field changes; treat as read-only)"""
+        state = (self.status, self.assigned_to, self.notes, tuple(self.recommendation_ids),
+                 self.detection_count, self.last_detected, self.updated_at)
+        if self._cached_dict is None or self._cached_state != state:
+            self._cached_dict = self._build_dict()
+            self._cached_state = state
+        return self._cached_dict
+    
+    def to_json(self) -> bytes:
+        """Serialize to_dict() output straight to JSON bytes"""
+        return _dumps(self.to_dict())
+    
+    def _build_dict(self) -> Dict:
+        """Build the JSON-serializable dict"""
         return {
             'alert_id': self.alert_id,
-            'severity': self.severity.value,
+            'severity': SEVERITY_NAMES[self.severity],
             'title': self.title,
             'description': self.description,
             'location': {
@@ -104,20 +280,20 @@ class Alert:
                 'occupancy_mismatch': self.occupancy_mismatch,
                 'detection_count': self.detection_count,
                 'time_range': {
-                    'first_detected': self.first_detected.isoformat(),
-                    'last_detected': self.last_detected.isoformat()
+                    'first_detected': format_timestamp_ns(self.first_detected),
+                    'last_detected': format_timestamp_ns(self.last_detected)
                 }
             },
             'evidence': self.evidence,
             'status': self.status,
             'assigned_to': self.assigned_to,
             'recommendations': self.recommendation_ids,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'created_at': format_timestamp_ns(self.created_at),
+            'updated_at': format_timestamp_ns(self.updated_at)
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Recommendation:
     """Specific action to address detected waste"""
     recommendation_id: str
@@ -126,7 +302,7 @@ class Recommendation:
     type: RecommendationType
     title: str
     description: str
-    detailed_action_steps: List[str]
+    detailed_action_steps: Sequence[str]  # Shared template tuple; treat as read-only
     
     # Business case
     estimated_annual_savings_inr: float
@@ -146,21 +322,37 @@ class Recommendation:
     # Status tracking
     status: str = "proposed"  # "proposed", "approved", "in_progress", "completed", "rejected"
     approved_by: Optional[str] = None
-    approval_date: Optional[datetime] = None
-    completion_date: Optional[datetime] = None
+    approval_date: Optional[int] = None  # Unix nanoseconds
+    completion_date: Optional[int] = None
     actual_savings_inr: Optional[float] = None  # After implementation
     
-    created_at: datetime = field(default_factory=datetime.now)
+    created_at: int = field(default_factory=time.time_ns)
+    
+    # Last to_dict() output and the mutable state it was built from
+    _cached_dict: Optional[Dict] = field(default=None, init=False, repr=False, compare=False)
+    _cached_state: Optional[Tuple] = field(default=None, init=False, repr=False, compare=False)
     
     def to_dict(self) -> Dict:
-        """Convert to JSON-serializable dict"""
+        """Convert to JSON-serializable dict (cached until a mutable field changes; treat as read-only)"""
+        state = (self.status, self.approved_by, self.approval_date, self.completion_date, self.actual_savings_inr)
+        if self._cached_dict is None or self._cached_state != state:
+            self._cached_dict = self._build_dict()
+            self._cached_state = state
+        return self._cached_dict
+    
+    def to_json(self) -> bytes:
+        """Serialize to_dict() output straight to JSON bytes"""
+        return _dumps(self.to_dict())
+    
+    def _build_dict(self) -> Dict:
+        """Build the JSON-serializable dict"""
         return {
             'recommendation_id': self.recommendation_id,
             'alert_id': self.alert_id,
-            'type': self.type.value,
+            'type': RECOMMENDATION_TYPE_NAMES[self.type],
             'title': self.title,
             'description': self.description,
-            'action_steps': self.detailed_action_steps,
+            'action_steps': list(self.detailed_action_steps),
             'business_case': {
                 'estimated_annual_savings_inr': round(self.estimated_annual_savings_inr, 0),
                 'implementation_cost_inr': round(self.implementation_cost_inr, 0),
@@ -173,18 +365,18 @@ class Recommendation:
                 'estimated_days': self.estimated_implementation_days,
                 'uptime_impact': self.required_uptime_impact
             },
-            'priority': self.priority.value,
+            'priority': SEVERITY_NAMES[self.priority],
             'urgency': self.urgency,
             'status': self.status,
             'approved_by': self.approved_by,
-            'approval_date': self.approval_date.isoformat() if self.approval_date else None,
-            'completion_date': self.completion_date.isoformat() if self.completion_date else None,
+            'approval_date': format_timestamp_ns(self.approval_date) if self.approval_date is not None else None,
+            'completion_date': format_timestamp_ns(self.completion_date) if self.completion_date is not None else None,
             'actual_savings_inr': self.actual_savings_inr,
-            'created_at': self.created_at.isoformat()
+            'created_at': format_timestamp_ns(self.created_at)
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class BuildingReport:
     """Comprehensive report for entire building"""
     building_id: str
@@ -220,7 +412,41 @@ class BuildingReport:
     
     def to_dict(self) -> Dict:
         """Convert to JSON-serializable dict"""
-        return {
+        payload = dict(self._sections())
+        payload['top_waste_leaks'] = [alert.to_dict() for alert in self.top_waste_leaks]
+        return payload
+    
+    def to_json(self) -> bytes:
+        """Serialize to_dict() output straight to JSON bytes"""
+        return _dumps(self.to_dict())
+    
+    def write_json(self, fp: BinaryIO) -> None:
+        """
+        Write the to_dict() JSON to a binary file object section by section.
+        
+        Each top-level section (and each top waste leak) is encoded and written on its
+        own, so the full dict tree is never built. Pass a buffered writer, e.g.
+        open(path, 'wb'), to keep the small writes cheap.
+        """
+        fp.write(b'{')
+        for i, (key, value) in enumerate(self._sections()):
+            if i:
+                fp.write(b',')
+            fp.write(_dumps(key) + b':')
+            if key == 'top_waste_leaks':
+                fp.write(b'[')
+                for j, alert in enumerate(value):
+                    if j:
+                        fp.write(b',')
+                    fp.write(alert.to_json())
+                fp.write(b']')
+            else:
+                fp.write(_dumps(value))
+        fp.write(b'}')
+    
+    def _sections(self) -> Iterator[Tuple[str, Any]]:
+        """Top-level (key, value) pairs of the JSON report; top_waste_leaks yields the Alert objects"""
+        yield from {
             'building_id': self.building_id,
             'report_date': self.report_date.isoformat(),
             'summary': {
@@ -234,7 +460,7 @@ class BuildingReport:
                 'annual_inr': round(self.total_annual_waste_inr, 0),
                 'potential_savings_annual_inr': round(self.projected_annual_savings_if_fixed_inr, 0)
             },
-            'top_waste_leaks': [alert.to_dict() for alert in self.top_waste_leaks],
+            'top_waste_leaks': self.top_waste_leaks,
             'waste_by_category': {k: round(v, 0) for k, v in self.waste_by_category.items()},
             'waste_by_floor': {k: round(v, 0) for k, v in self.waste_by_floor.items()},
             'waste_by_type': {k: round(v, 0) for k, v in self.waste_by_type.items()},
@@ -247,7 +473,7 @@ class BuildingReport:
                 'vs_last_month_percent': round(self.trend_vs_last_month, 1),
                 'vs_last_year_percent': round(self.trend_vs_last_year, 1)
             }
-        }
+        }.items()
 
 
 class AlertGenerator:
@@ -257,10 +483,114 @@ class AlertGenerator:
     
     def __init__(self, cost_per_kwh_inr: float = 8.0):
         self.cost_per_kwh_inr = cost_per_kwh_inr
+        self._cost_per_wh_inr = cost_per_kwh_inr / 1000.0
         self.alerts: Dict[str, Alert] = {}
         self.recommendations: Dict[str, Recommendation] = {}
-        self.alert_counter = 0
-        self.recommendation_counter = 0
+        # Secondary indexes over self.recommendations: alert_id / status -> {recommendation_id: rec}
+        self.recs_by_alert: Dict[str, Dict[str, Recommendation]] = defaultdict(dict)
+        self.recs_by_status: Dict[str, Dict[str, Recommendation]] = defaultdict(dict)
+        self._alert_seq = count(1)
+        self._recommendation_seq = count(1)
+        
+        # Columnar copy of the per-alert fields aggregated by build_building_report.
+        # Row i belongs to self._alert_ids[i]; labels are stored as codes into the vocabularies.
+        self._alert_ids: List[str] = []
+        self._alert_rows: Dict[str, int] = {}
+        self._columns: Dict[str, np.ndarray] = {
+            'annual_cost': np.empty(64, dtype=np.float64),
+            'monthly_cost': np.empty(64, dtype=np.float64),
+            'severity': np.empty(64, dtype=np.int8),
+            'status': np.empty(64, dtype=np.int32),
+            'category': np.empty(64, dtype=np.int32),
+            'floor': np.empty(64, dtype=np.int32),
+            'waste_type': np.empty(64, dtype=np.int32)
+        }
+        self._vocabs: Dict[str, Dict[Optional[str], int]] = {
+            'status': {},
+            'category': {},
+            'floor': {},
+            'waste_type': {}
+        }
+    
+    @property
+    def alert_counter(self) -> int:
+        """Number of alerts generated so far"""
+        return len(self._alert_ids)
+    
+    @property
+    def recommendation_counter(self) -> int:
+        """Number of recommendations generated so far"""
+        return len(self.recommendations)
+    
+    def _code(self, vocab: str, label: Optional[str]) -> int:
+        """Return the integer code of a label, adding it to the vocabulary on first sight"""
+        codes = self._vocabs[vocab]
+        code = codes.get(label)
+        if code is None:
+            code = codes[label] = len(codes)
+        return code
+    
+    def _index_alerts(self, alerts: List[Alert]) -> None:
+        """Append alerts to the columnar store, doubling capacity when full"""
+        start = len(self._alert_ids)
+        stop = start + len(alerts)
+        capacity = len(self._columns['annual_cost'])
+        if stop > capacity:
+            while capacity < stop:
+                capacity *= 2
+            for name, column in self._columns.items():
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[:start] = column[:start]
+                self._columns[name] = grown
+        
+        columns = self._columns
+        columns['annual_cost'][start:stop] = [a.annual_cost_loss_inr for a in alerts]
+        columns['monthly_cost'][start:stop] = [a.monthly_cost_loss_inr for a in alerts]
+        columns['severity'][start:stop] = [a.severity for a in alerts]
+        columns['status'][start:stop] = [self._code('status', a.status) for a in alerts]
+        columns['category'][start:stop] = [self._code('category', a.device_category) for a in alerts]
+        columns['floor'][start:stop] = [self._code('floor', a.location_floor) for a in alerts]
+        columns['waste_type'][start:stop] = [self._code('waste_type', a.waste_type) for a in alerts]
+        
+        for row, alert in enumerate(alerts, start):
+            self._alert_rows[alert.alert_id] = row
+            self._alert_ids.append(alert.alert_id)
+    
+    def update_alert_status(self, alert_id: str, status: str, assigned_to: Optional[str] = None) -> Alert:
+        """
+        Change an alert's status (e.g. "acknowledged") and keep the report columns in sync.
+        
+        Args:
+            alert_id: Alert identifier
+            status: New status
+            assigned_to: Optional assignee
+            
+        Returns:
+            The updated Alert
+        """
+        alert = self.alerts[alert_id]
+        alert.status = status
+        alert.assigned_to = assigned_to
+        alert.updated_at = time.time_ns()
+        self._columns['status'][self._alert_rows[alert_id]] = self._code('status', status)
+        return alert
+    
+    def approve_recommendation(self, recommendation_id: str, approved_by: str) -> Recommendation:
+        """
+        Mark a recommendation as approved for implementation.
+        
+        Args:
+            recommendation_id: Recommendation identifier
+            approved_by: Who approved it
+            
+        Returns:
+            The updated Recommendation
+        """
+        rec = self.recommendations[recommendation_id]
+        self._set_recommendation_status(rec, "approved")
+        rec.approved_by = approved_by
+        rec.approval_date = time.time_ns()
+        return rec
     
     def generate_alert_from_insight(self, device_id: str, device_category: str,
                                    waste_type: str, risk_level: str,
@@ -288,32 +618,72 @@ class AlertGenerator:
         Returns:
             Generated Alert object
         """
-        self.alert_counter += 1
-        alert_id = f"ALERT_{self.alert_counter:06d}"
+        alert_id = f"ALERT_{next(self._alert_seq):06d}"
+        now = time.time_ns()
         
         # Calculate cost impact
-        daily_wasted_kwh = (power_disparity_w * duration_hours) / 1000
-        daily_cost = daily_wasted_kwh * self.cost_per_kwh_inr
+        daily_cost = power_disparity_w * duration_hours * self._cost_per_wh_inr
         monthly_cost = daily_cost * 30
         annual_cost = daily_cost * 365
         
+        alert = self._make_alert(alert_id, now, device_id, device_category, waste_type, risk_level,
+                                 location_floor, location_zone, duration_hours, occupancy_mismatch,
+                                 evidence, daily_cost, monthly_cost, annual_cost)
+        
+        self.alerts[alert_id] = alert
+        self._index_alerts([alert])
+        return alert
+    
+    def generate_alerts_batch(self, device_ids: Sequence[str], device_categories: Sequence[str],
+                              waste_types: Sequence[str], risk_levels: Sequence[str],
+                              location_floors: Sequence[Optional[str]],
+                              location_zones: Sequence[Optional[str]],
+                              power_disparity_w: np.ndarray, duration_hours: np.ndarray,
+                              occupancy_mismatch: np.ndarray,
+                              evidence: Sequence[List[str]]) -> List[Alert]:
+        """
+        Convert many insights into alerts at once (same result as calling
+        generate_alert_from_insight per insight).
+        
+        Args are parallel sequences with one entry per insight, as documented on
+        generate_alert_from_insight. Costs are computed as whole arrays; only the
+        Alert objects themselves are built per insight.
+        
+        Returns:
+            Generated Alert objects, in input order
+        """
+        duration = np.asarray(duration_hours, dtype=np.float64)
+        daily_costs = np.asarray(power_disparity_w, dtype=np.float64) * duration * self._cost_per_wh_inr
+        monthly_costs = daily_costs * 30
+        annual_costs = daily_costs * 365
+        
+        alert_ids = [f"ALERT_{i:06d}" for i in islice(self._alert_seq, len(daily_costs))]
+        now = time.time_ns()
+        
+        alerts = [
+            self._make_alert(alert_id, now, *insight)
+            for alert_id, insight in zip(alert_ids, zip(
+                device_ids, device_categories, waste_types, risk_levels, location_floors, location_zones,
+                duration.tolist(), np.asarray(occupancy_mismatch, dtype=bool).tolist(), evidence,
+                daily_costs.tolist(), monthly_costs.tolist(), annual_costs.tolist()
+            ))
+        ]
+        
+        self.alerts.update((alert.alert_id, alert) for alert in alerts)
+        self._index_alerts(alerts)
+        return alerts
+    
+    def _make_alert(self, alert_id: str, now: int, device_id: str, device_category: str,
+                    waste_type: str, risk_level: str, location_floor: Optional[str],
+                    location_zone: Optional[str], duration_hours: float, occupancy_mismatch: bool,
+                    evidence: List[str], daily_cost: float, monthly_cost: float,
+                    annual_cost: float) -> Alert:
+        """Build an Alert from one insight and its precomputed costs"""
         # Map risk level to severity
-        severity_map = {
-            'critical': AlertSeverity.CRITICAL,
-            'high': AlertSeverity.HIGH,
-            'medium': AlertSeverity.MEDIUM,
-            'low': AlertSeverity.LOW
-        }
-        severity = severity_map.get(risk_level, AlertSeverity.MEDIUM)
+        severity = RISK_SEVERITY.get(risk_level, AlertSeverity.MEDIUM)
         
         # Create human-readable title
-        titles = {
-            'phantom_load': f"Phantom Load: {device_category} consuming power 24/7",
-            'post_occupancy': f"Post-Occupancy Waste: {device_category} left on after hours",
-            'inefficient_usage': f"Inefficient Usage: {device_category} running suboptimally",
-            'normal': f"Notice: {device_category} operating normally"
-        }
-        title = titles.get(waste_type, f"Energy Waste: {waste_type}")
+        title = _alert_title(waste_type, device_category)
         
         # Description with cost emphasis
         description = f"{device_category.title()} wasting ₹{annual_cost:,.0f}/year ({daily_cost:,.0f}/day). "
@@ -321,7 +691,10 @@ class AlertGenerator:
             description += "Device consuming power when building is unoccupied. "
         description += "This includes recommended actions for cost recovery."
         
-        alert = Alert(
+        # Evidence phrases repeat across alerts; keep one shared copy of each
+        evidence = [sys.intern(e) for e in evidence]
+        
+        return Alert(
             alert_id=alert_id,
             severity=severity,
             title=title,
@@ -335,15 +708,14 @@ class AlertGenerator:
             annual_cost_loss_inr=annual_cost,
             waste_type=waste_type,
             pattern_frequency="recurring" if duration_hours >= 4 else "periodic",
-            first_detected=datetime.now(),
-            last_detected=datetime.now(),
+            first_detected=now,
+            last_detected=now,
             detection_count=1,
             evidence=evidence,
-            occupancy_mismatch=occupancy_mismatch
+            occupancy_mismatch=occupancy_mismatch,
+            created_at=now,
+            updated_at=now
         )
-        
-        self.alerts[alert_id] = alert
-        return alert
     
     def generate_recommendations(self, alert: Alert) -> List[Recommendation]:
         """
@@ -356,116 +728,63 @@ class AlertGenerator:
             List of Recommendation objects
         """
         recommendations = []
+        now = time.time_ns()
         
-        # Recommendations depend on waste type
-        if alert.waste_type == 'phantom_load':
-            # Recommend smart outlet/power strip
-            self.recommendation_counter += 1
-            rec1 = Recommendation(
-                recommendation_id=f"REC_{self.recommendation_counter:06d}",
-                alert_id=alert.alert_id,
-                type=RecommendationType.AUTOMATION,
-                title="Install Smart Power Strip",
-                description="Smart outlet with motion sensor and schedule timer to eliminate phantom load.",
-                detailed_action_steps=[
-                    "Identify device and power outlet location",
-                    "Procure smart multi-outlet power strip (₹500-1000)",
-                    "Install and configure schedule (off during off-hours)",
-                    "Test functionality and confirm power drops to ~2W"
-                ],
-                estimated_annual_savings_inr=alert.annual_cost_loss_inr * 0.85,
-                implementation_cost_inr=800,
-                payback_period_months=0.5,
-                confidence_percent=92,
-                responsible_team="operations",
-                estimated_implementation_days=1,
-                required_uptime_impact="none",
-                priority=alert.severity,
-                urgency="high"
-            )
-            recommendations.append(rec1)
-            
-            # Recommend monitoring
-            self.recommendation_counter += 1
-            rec2 = Recommendation(
-                recommendation_id=f"REC_{self.recommendation_counter:06d}",
-                alert_id=alert.alert_id,
-                type=RecommendationType.MONITORING,
-                title="Install Power Monitoring",
-                description="Add sub-metering to track actual consumption and validate savings.",
-                detailed_action_steps=[
-                    "Install smart meter on target circuit",
-                    "Configure alerts in building management system",
-                    "Monthly review of consumption trends"
-                ],
-                estimated_annual_savings_inr=alert.annual_cost_loss_inr * 0.05,  # Just from visibility
-                implementation_cost_inr=1200,
-                payback_period_months=24,
-                confidence_percent=70,
-                responsible_team="maintenance",
-                estimated_implementation_days=3,
-                required_uptime_impact="minor",
-                priority=AlertSeverity.MEDIUM,
-                urgency="normal"
-            )
-            recommendations.append(rec2)
-        
-        elif alert.waste_type == 'post_occupancy':
-            # Recommend occupancy-based automation
-            self.recommendation_counter += 1
-            rec1 = Recommendation(
-                recommendation_id=f"REC_{self.recommendation_counter:06d}",
+        # Recommendations depend on waste type; behavior change (no cost) is always recommended
+        templates = RECOMMENDATION_TEMPLATES.get(alert.waste_type, []) + [BEHAVIOR_RECOMMENDATION]
+        rec_ids = [f"REC_{i:06d}" for i in islice(self._recommendation_seq, len(templates))]
+        for rec_id, template in zip(rec_ids, templates):
+            recommendations.append(Recommendation(
+                recommendation_id=rec_id,
                 alert_id=alert.alert_id,
-                type=RecommendationType.AUTOMATION,
-                title="Install Occupancy-Based Controller",
-                description="Smart controller combining occupancy sensor + timer to auto-shutdown device after occupants leave.",
-                detailed_action_steps=[
-                    "Install PIR occupancy sensor near main entry",
-                    "Connect to smart relay/contactor for device",
-                    "Configure grace period (15-30 min after last motion)",
-                    "Test multiple occupancy/departure scenarios"
-                ],
-                estimated_annual_savings_inr=alert.annual_cost_loss_inr * 0.75,
-                implementation_cost_inr=2500,
-                payback_period_months=3,
-                confidence_percent=88,
-                responsible_team="maintenance",
-                estimated_implementation_days=2,
-                required_uptime_impact="minor",
-                priority=alert.severity,
-                urgency="high"
-            )
-            recommendations.append(rec1)
-        
-        # Always recommend behavior change (no cost)
-        self.recommendation_counter += 1
-        rec_behavior = Recommendation(
-            recommendation_id=f"REC_{self.recommendation_counter:06d}",
-            alert_id=alert.alert_id,
-            type=RecommendationType.BEHAVIOR,
-            title="Occupant Awareness Campaign",
-            description="Low-cost behavior change through signage and email reminders about turning off equipment.",
-            detailed_action_steps=[
-                "Send email reminder to building occupants",
-                "Post reminder signage near device",
-                "Include in next facility briefing",
-                "Monthly reminder emails"
-            ],
-            estimated_annual_savings_inr=alert.annual_cost_loss_inr * 0.15,
-            implementation_cost_inr=100,
-            payback_period_months=0.1,
-            confidence_percent=40,
-            responsible_team="operations",
-            estimated_implementation_days=1,
-            required_uptime_impact="none",
-            priority=AlertSeverity.LOW,
-            urgency="low"
-        )
-        recommendations.append(rec_behavior)
+                detailed_action_steps=template['steps'],
+                estimated_annual_savings_inr=alert.annual_cost_loss_inr * template['savings_factor'],
+                priority=alert.severity if template['priority'] is None else template['priority'],
+                created_at=now,
+                **template['fields']
+            ))
         
         self.recommendations.update({rec.recommendation_id: rec for rec in recommendations})
+        for rec in recommendations:
+            self.recs_by_alert[rec.alert_id][rec.recommendation_id] = rec
+            self.recs_by_status[rec.status][rec.recommendation_id] = rec
         return recommendations
     
+    def _set_recommendation_status(self, rec: Recommendation, status: str) -> None:
+        """Change a recommendation's status and move it to the matching status index"""
+        bucket = self.recs_by_status.get(rec.status)
+        if bucket is not None:
+            bucket.pop(rec.recommendation_id, None)
+            if not bucket:
+                del self.recs_by_status[rec.status]
+        rec.status = status
+        self.recs_by_status[status][rec.recommendation_id] = rec
+    
+    def filter_recommendations(self, alert_id: Optional[str] = None,
+                               status: Optional[str] = None) -> List[Recommendation]:
+        """
+        Filter recommendations by alert and/or status using the secondary indexes.
+        
+        Args:
+            alert_id: Only recommendations addressing this alert
+            status: Only recommendations with this status
+            
+        Returns:
+            Matching recommendations (unordered when filtering)
+        """
+        if not alert_id and not status:
+            return list(self.recommendations.values())
+        
+        candidates = [
+            self.recs_by_alert.get(alert_id, {}) if alert_id else None,
+            self.recs_by_status.get(status, {}) if status else None
+        ]
+        candidates = sorted((c for c in candidates if c is not None), key=len)
+        
+        # Walk the smaller index and check membership in the other
+        smallest, others = candidates[0], candidates[1:]
+        return [rec for rec_id, rec in smallest.items() if all(rec_id in other for other in others)]
+    
     def filter_alerts(self, floor: Optional[str] = None,
                      device_category: Optional[str] = None,
                      min_severity: Optional[AlertSeverity] = None,
@@ -484,32 +803,29 @@ class AlertGenerator:
         Returns:
             Filtered list of alerts
         """
-        filtered = list(self.alerts.values())
+        n = len(self._alert_ids)
+        columns = {name: column[:n] for name, column in self._columns.items()}
+        mask = np.ones(n, dtype=bool)
         
+        # Label filters compare integer codes; an unseen label matches nothing
         if floor:
-            filtered = [a for a in filtered if a.location_floor == floor]
+            mask &= columns['floor'] == self._vocabs['floor'].get(floor, -1)
         
         if device_category:
-            filtered = [a for a in filtered if a.device_category.lower() == device_category.lower()]
-        
-        if min_severity:
-            severity_order = {
-                AlertSeverity.INFO: 0,
-                AlertSeverity.LOW: 1,
-                AlertSeverity.MEDIUM: 2,
-                AlertSeverity.HIGH: 3,
-                AlertSeverity.CRITICAL: 4
-            }
-            min_val = severity_order.get(min_severity, 0)
-            filtered = [a for a in filtered if severity_order.get(a.severity, 0) >= min_val]
+            category = device_category.lower()
+            codes = [code for label, code in self._vocabs['category'].items() if label.lower() == category]
+            mask &= np.isin(columns['category'], codes)
+        
+        if min_severity is not None:
+            mask &= columns['severity'] >= min_severity
         
         if status:
-            filtered = [a for a in filtered if a.status == status]
+            mask &= columns['status'] == self._vocabs['status'].get(status, -1)
         
         if min_annual_cost_inr:
-            filtered = [a for a in filtered if a.annual_cost_loss_inr >= min_annual_cost_inr]
+            mask &= columns['annual_cost'] >= min_annual_cost_inr
         
-        return filtered
+        return [self.alerts[self._alert_ids[row]] for row in np.flatnonzero(mask)]
     
     def build_building_report(self, building_id: str) -> BuildingReport:
         """
@@ -521,39 +837,51 @@ class AlertGenerator:
         Returns:
             BuildingReport object
         """
-        all_alerts = list(self.alerts.values())
+        n = len(self._alert_ids)
+        columns = {name: column[:n] for name, column in self._columns.items()}
+        annual = columns['annual_cost']
         
         # Summary stats
-        total_alerts = len(all_alerts)
-        critical = sum(1 for a in all_alerts if a.severity == AlertSeverity.CRITICAL)
-        high = sum(1 for a in all_alerts if a.severity == AlertSeverity.HIGH)
-        open_alerts = sum(1 for a in all_alerts if a.status == "open")
+        total_alerts = n
+        severity_counts = np.bincount(columns['severity'], minlength=len(AlertSeverity))
+        critical = int(severity_counts[AlertSeverity.CRITICAL])
+        high = int(severity_counts[AlertSeverity.HIGH])
+        open_code = self._vocabs['status'].get("open")
+        open_alerts = int(np.count_nonzero(columns['status'] == open_code)) if open_code is not None else 0
         
         # Cost summary
-        total_monthly = sum(a.monthly_cost_loss_inr for a in all_alerts)
-        total_annual = sum(a.annual_cost_loss_inr for a in all_alerts)
+        total_monthly = float(columns['monthly_cost'].sum())
+        total_annual = float(annual.sum())
         
-        # Top 3 waste leaks by cost
-        top_waste = sorted(all_alerts, key=lambda a: a.annual_cost_loss_inr, reverse=True)[:3]
+        # Top 3 waste leaks by cost (ties keep creation order)
+        top_rows = np.arange(n) if n <= 3 else np.argpartition(-annual, 2)[:3]
+        top_rows = top_rows[np.lexsort((top_rows, -annual[top_rows]))]
+        top_waste = [self.alerts[self._alert_ids[row]] for row in top_rows]
         
         # Aggregate by category
-        waste_by_category = {}
-        waste_by_floor = {}
-        waste_by_type = {}
-        
-        for alert in all_alerts:
-            waste_by_category[alert.device_category] = waste_by_category.get(alert.device_category, 0) + alert.annual_cost_loss_inr
-            floor_key = alert.location_floor or "Unknown"
-            waste_by_floor[floor_key] = waste_by_floor.get(floor_key, 0) + alert.annual_cost_loss_inr
-            waste_by_type[alert.waste_type] = waste_by_type.get(alert.waste_type, 0) + alert.annual_cost_loss_inr
+        waste_by_category, waste_by_floor, waste_by_type = (
+            dict(zip(self._vocabs[name], np.bincount(columns[name], weights=annual,
+                                                       minlength=len(self._vocabs[name])).tolist()))
+            for name in ['category', 'floor', 'waste_type']
+        )
+        if None in waste_by_floor or '' in waste_by_floor:
+            # Alerts without a floor are reported together under "Unknown"
+            by_floor = defaultdict(float)
+            for floor, cost in waste_by_floor.items():
+                by_floor[floor or "Unknown"] += cost
+            waste_by_floor = dict(by_floor)
         
-        # Recommendations stats
+        # Recommendations stats and potential savings (single pass)
         total_recs = len(self.recommendations)
-        approved_recs = sum(1 for r in self.recommendations.values() if r.status == "approved")
-        payback = np.mean([r.payback_period_months for r in self.recommendations.values()]) if self.recommendations else 0
-        
-        # Potential savings
-        potential_savings = sum(r.estimated_annual_savings_inr for r in self.recommendations.values())
+        approved_recs = 0
+        payback_total = 0.0
+        potential_savings = 0
+        for rec in self.recommendations.values():
+            if rec.status == "approved":
+                approved_recs += 1
+            payback_total += rec.payback_period_months
+            potential_savings += rec.estimated_annual_savings_inr
+        payback = payback_total / total_recs if total_recs else 0
         
         report = BuildingReport(
             building_id=building_id,
@@ -5,16 +5,28 @@ with integrated AI-based Energy Waste Detection & Reasoning Engine
 
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 import joblib
 import numpy as np
 import xgboost as xgb
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import json
 from datetime import datetime
+import time
+from functools import lru_cache
 import tempfile
+import shutil
 import os
+import traceback
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; responses fall back to the stdlib encoder
+    orjson = None
 
 # Import reasoning engine
 from energy_waste_reasoning import (
@@ -28,6 +40,15 @@ from energy_waste_reasoning import (
 # Import AI Energy Analyst
 from ai_energy_analyst import AIEnergyAnalyst
 
+# Dynamic batching for single-row predictions
+from micro_batcher import CACHE_SIZE, MicroBatcher
+
+# Optional ONNX Runtime backend for the energy model
+from onnx_inference import load_onnx_regressor
+
+# Optional Treelite-compiled backend for the energy model
+from treelite_inference import load_treelite_predictor
+
 # Get model directory
 MODEL_DIR = Path(__file__).parent / "models"
 
@@ -35,7 +56,8 @@ MODEL_DIR = Path(__file__).parent / "models"
 app = FastAPI(
     title="AI-Based Energy Waste Detection & Reasoning Engine",
     description="XGBoost-based appliance power disparity detection + Reasoning Engine for actionable waste insights",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
 )
 
 # Add CORS middleware
@@ -49,9 +71,52 @@ app.add_middleware(
 
 # Global variables for loaded model
 model = None
+booster = None
+treelite_model = None
+onnx_model = None
+iteration_range = (0, 0)
 label_encoders = None
+label_maps: Dict[str, Dict[str, int]] = {}
 feature_names = None
 
+# Source expression for each model feature, read off a request ``d``;
+# power_ratio is derived column-wise once the matrix is filled
+FEATURE_EXPRESSIONS = {
+    'hour': 'd.hour',
+    'day_of_week': 'd.day_of_week',
+    'day_of_month': 'd.day_of_month',
+    'month': 'd.month',
+    'quarter': 'd.quarter',
+    'is_weekend': 'd.is_weekend',
+    'appliance_id_encoded': 'id_codes[d.appliance_id]',
+    # If category not in encoder, use most common (0)
+    'appliance_category_encoded': 'category_codes.get(d.appliance_category, 0)',
+    'power_max': 'd.power_max',
+    'power_ratio': '0.0',
+    'power_rolling_mean_24': 'd.power_rolling_mean_24',
+    'power_rolling_std_24': 'd.power_rolling_std_24',
+}
+
+
+def compile_row_builder(names: List[str]):
+    """Generate build_rows(inputs, id_codes, category_codes) returning row tuples in model column order
+    
+    Every column's attribute read / encoder lookup is inlined into a single list
+    comprehension, so the feature layout costs nothing per request.
+    """
+    row = ", ".join(FEATURE_EXPRESSIONS[name] for name in names)
+    source = (
+        "def build_rows(inputs, id_codes, category_codes):\n"
+        f"    return [({row},) for d in inputs]\n"
+    )
+    namespace: Dict[str, Any] = {}
+    exec(source, namespace)
+    return namespace['build_rows']
+
+
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_EXPRESSIONS)}
+build_rows = compile_row_builder(list(FEATURE_EXPRESSIONS))
+
 # Reasoning engine instance
 reasoning_engine: Optional[EnergyWasteReasoningEngine] = None
 
@@ -61,6 +126,8 @@ ai_analyst: Optional[AIEnergyAnalyst] = None
 
 class PredictionInput(BaseModel):
     """Input schema for prediction"""
+    model_config = ConfigDict(frozen=True)
+    
     appliance_id: str = Field(..., example="FRIDGE_1")
     appliance_category: str = Field(..., example="kitchen")
     hour: int = Field(..., ge=0, le=23, example=14)
@@ -162,7 +229,9 @@ class HealthCheck(BaseModel):
 
 def load_model_artifacts():
     """Load model and artifacts on startup"""
-    global model, label_encoders, feature_names, reasoning_engine, ai_analyst
+    global model, booster, treelite_model, onnx_model, iteration_range, label_encoders, label_maps, feature_names
+    global FEATURE_INDEX, build_rows
+    global reasoning_engine, ai_analyst
     
     try:
         model_path = MODEL_DIR / "xgb_energy_model.pkl"
@@ -174,8 +243,32 @@ def load_model_artifacts():
             return False
         
         model = joblib.load(model_path)
+        booster = model.get_booster()
+        # One thread per predict call: concurrency comes from batching requests,
+        # not from fanning each small matrix out over every core
+        booster.set_param({'nthread': 1})
+        try:
+            # Predict with the early-stopped tree count, as XGBRegressor.predict does
+            iteration_range = (0, model.best_iteration + 1)
+        except AttributeError:
+            iteration_range = (0, 0)
+        treelite_model = load_treelite_predictor(MODEL_DIR / "xgb_energy_model.so", nthread=1)
+        onnx_model = load_onnx_regressor(MODEL_DIR / "xgb_energy_model.onnx", intra_op_threads=1)
         label_encoders = joblib.load(encoders_path)
+        label_maps = build_label_maps(label_encoders)
+        simulation_matrix.cache_clear()
+        model_summary.cache_clear()
+        prediction_batcher.clear_cache()
         feature_names = joblib.load(features_path)
+        FEATURE_INDEX = {name: i for i, name in enumerate(feature_names)}
+        build_rows = compile_row_builder(feature_names)
+        # The column layout is checked once here; predictions skip the per-call check
+        if booster.num_features() != len(feature_names):
+            raise ValueError(
+                f"Model expects {booster.num_features()} features, feature_names lists {len(feature_names)}"
+            )
+        # Warm up the predictor so lazy backend setup is not paid by the first request
+        model_predict(np.zeros((1, len(feature_names)), dtype=np.float32))
         
         # Initialize reasoning engine
         reasoning_engine = EnergyWasteReasoningEngine(
@@ -185,10 +278,18 @@ def load_model_artifacts():
         
         # Initialize AI Energy Analyst
         ai_analyst = AIEnergyAnalyst(cost_per_kwh=8.0)
+        ai_analyst.warm_up()
         
         print(f"✓ Model loaded successfully")
         print(f"  Features: {len(feature_names)}")
         print(f"  Encoders: {list(label_encoders.keys())}")
+        if treelite_model is not None:
+            backend = 'Treelite'
+        elif onnx_model is not None:
+            backend = 'ONNX Runtime'
+        else:
+            backend = 'XGBoost'
+        print(f"  Backend: {backend}")
         print(f"✓ Reasoning Engine initialized")
         print(f"✓ AI Energy Analyst initialized")
         
@@ -198,32 +299,56 @@ def load_model_artifacts():
         return False
 
 
+# Response timestamps are formatted at most once per second
+_LAST_ISO = (0, "")
+
+
+def cached_iso() -> str:
+    """Current local time as an ISO string, truncated to the second"""
+    global _LAST_ISO
+    t = int(time.time())
+    if t != _LAST_ISO[0]:
+        _LAST_ISO = (t, datetime.fromtimestamp(t).isoformat())
+    return _LAST_ISO[1]
+
+
 @app.on_event("startup")
 async def startup_event():
     """Load model on startup"""
     if load_model_artifacts():
+        prediction_batcher.start()
         print("✓ API ready for predictions")
     else:
         print("⚠ API starting but model not loaded")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the prediction batcher"""
+    await prediction_batcher.stop()
+
+
+# Root endpoint payload, identical for every request
+ROOT_INFO = {
+    "name": "AI-Based Energy Waste Detection & Reasoning Engine",
+    "version": "2.0.0",
+    "description": "ML-powered energy waste detection with explainable reasoning",
+    "docs": "/docs",
+    "endpoints": {
+        "health": "/health",
+        "predict_single": "/predict",
+        "predict_batch": "/predict/batch",
+        "analyze_waste_single": "/analyze-waste",
+        "analyze_waste_batch": "/analyze-waste/batch",
+        "model_info": "/model/info"
+    }
+}
+
+
 @app.get("/", tags=["Info"])
 async def root():
     """Root endpoint"""
-    return {
-        "name": "AI-Based Energy Waste Detection & Reasoning Engine",
-        "version": "2.0.0",
-        "description": "ML-powered energy waste detection with explainable reasoning",
-        "docs": "/docs",
-        "endpoints": {
-            "health": "/health",
-            "predict_single": "/predict",
-            "predict_batch": "/predict/batch",
-            "analyze_waste_single": "/analyze-waste",
-            "analyze_waste_batch": "/analyze-waste/batch",
-            "model_info": "/model/info"
-        }
-    }
+    return ROOT_INFO
 
 
 @app.get("/health", response_model=HealthCheck, tags=["Health"])
@@ -232,16 +357,13 @@ async def health_check():
     return {
         "status": "healthy",
         "model_loaded": model is not None,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": cached_iso()
     }
 
 
-@app.get("/model/info", tags=["Model"])
-async def model_info():
-    """Get model information"""
-    if model is None:
-        raise HTTPException(status_code=503, detail="Model not loaded")
-    
+@lru_cache(maxsize=1)
+def model_summary() -> Dict[str, Any]:
+    """Model information payload, rebuilt only when the model is reloaded"""
     return {
         "model_type": "XGBoost Regressor",
         "n_estimators": model.n_estimators,
@@ -253,46 +375,107 @@ async def model_info():
     }
 
 
-def encode_input(input_data: PredictionInput) -> np.ndarray:
-    """Encode input data for prediction"""
+@app.get("/model/info", tags=["Model"])
+async def model_info():
+    """Get model information"""
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    return model_summary()
+
+
+def build_label_maps(encoders: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """Precompute {class: code} lookups so encoding avoids LabelEncoder.transform"""
+    return {
+        column: {label: code for code, label in enumerate(encoder.classes_.tolist())}
+        for column, encoder in encoders.items()
+    }
+
+
+def build_matrix(inputs: List[PredictionInput]) -> np.ndarray:
+    """Assemble the (n, n_features) model input directly from request objects"""
     try:
-        # Encode categorical features
-        appliance_id_encoded = label_encoders['appliance_id'].transform(
-            [input_data.appliance_id]
-        )[0]
-        
+        id_codes = label_maps['appliance_id']
+        category_codes = label_maps.get('appliance_category', {})
         try:
-            appliance_category_encoded = label_encoders['appliance_category'].transform(
-                [input_data.appliance_category]
-            )[0]
-        except:
-            # If category not in encoder, use most common (0)
-            appliance_category_encoded = 0
+            rows = build_rows(inputs, id_codes, category_codes)
+        except KeyError as e:
+            raise ValueError(f"y contains previously unseen labels: {e.args[0]!r}")
+        X = np.array(rows, dtype=np.float32).reshape(len(inputs), len(FEATURE_INDEX))
         
-        # Calculate power_ratio
-        power_ratio = input_data.power_rolling_mean_24 / (input_data.power_max + 1)
-        
-        # Create feature vector in correct order
-        features = np.array([[
-            input_data.hour,
-            input_data.day_of_week,
-            input_data.day_of_month,
-            input_data.month,
-            input_data.quarter,
-            input_data.is_weekend,
-            appliance_id_encoded,
-            appliance_category_encoded,
-            input_data.power_max,
-            power_ratio,
-            input_data.power_rolling_mean_24,
-            input_data.power_rolling_std_24
-        ]])
+        # Calculate power_ratio for all rows at once; single-row requests (the
+        # common case) use float32 scalar math, which gives the same result
+        column = FEATURE_INDEX
+        if len(inputs) == 1:
+            row = X[0]
+            row[column['power_ratio']] = (
+                row[column['power_rolling_mean_24']] / (row[column['power_max']] + np.float32(1))
+            )
+        else:
+            np.divide(X[:, column['power_rolling_mean_24']], X[:, column['power_max']] + 1,
+                      out=X[:, column['power_ratio']])
         
-        return features
+        return X
     except Exception as e:
         raise ValueError(f"Error encoding features: {str(e)}")
 
 
+def model_predict(X: np.ndarray) -> np.ndarray:
+    """Predict via the compiled Treelite library or ONNX Runtime when exported,
+    else straight from the booster"""
+    if treelite_model is not None:
+        return treelite_model.predict(X)
+    if onnx_model is not None:
+        return onnx_model.predict(X)
+    return booster.inplace_predict(X, iteration_range=iteration_range, validate_features=False)
+
+
+def encode_input(input_data: PredictionInput) -> np.ndarray:
+    """Encode input data for prediction"""
+    return build_matrix([input_data])
+
+
+def predict_queued(inputs: List[PredictionInput]) -> List[Any]:
+    """Predict a micro-batch of queued requests with a single model call"""
+    try:
+        X = build_matrix(inputs)
+    except ValueError:
+        # Some row failed to encode: report it to its own caller only
+        results: List[Any] = [None] * len(inputs)
+        rows, positions = [], []
+        for i, input_data in enumerate(inputs):
+            try:
+                rows.append(encode_input(input_data))
+                positions.append(i)
+            except ValueError as e:
+                results[i] = e
+        if rows:
+            for i, prediction in zip(positions, model_predict(np.vstack(rows))):
+                results[i] = prediction
+        return results
+    return list(model_predict(X))
+
+
+# Model calls run on one dedicated thread: the event loop stays free to accept
+# (and batch) requests, and predict calls never contend with each other
+predict_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+
+
+async def run_prediction(fn, *args):
+    """Run a CPU-bound model call on the predict thread"""
+    return await asyncio.get_running_loop().run_in_executor(predict_executor, fn, *args)
+
+
+prediction_batcher = MicroBatcher(predict_queued, executor=predict_executor, cache_size=CACHE_SIZE)
+
+
+def score_predictions(predictions: np.ndarray, power_max: np.ndarray):
+    """Clamp predictions at zero and score confidence (0-100) against each power_max"""
+    predicted_power = np.maximum(predictions, 0)
+    confidence = np.clip(100 - np.abs(predicted_power - power_max) / power_max * 50, 0, 100)
+    return predicted_power, confidence
+
+
 @app.post("/predict", response_model=PredictionOutput, tags=["Predictions"])
 async def predict(input_data: PredictionInput):
     """Predict energy consumption for a single appliance"""
@@ -300,11 +483,11 @@ async def predict(input_data: PredictionInput):
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        # Encode input
-        features = encode_input(input_data)
-        
-        # Make prediction
-        prediction = model.predict(features)[0]
+        # Make prediction (coalesced with concurrent requests)
+        if prediction_batcher.running:
+            prediction = await prediction_batcher.submit(input_data)
+        else:
+            prediction = (await run_prediction(model_predict, encode_input(input_data)))[0]
         
         # Ensure positive prediction
         predicted_power = max(0, float(prediction))
@@ -316,7 +499,7 @@ async def predict(input_data: PredictionInput):
         return PredictionOutput(
             predicted_power_w=round(predicted_power, 2),
             confidence=round(confidence, 2),
-            timestamp=datetime.now().isoformat()
+            timestamp=cached_iso()
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Prediction error: {str(e)}")
@@ -329,27 +512,31 @@ async def predict_batch(batch_input: BatchPredictionInput):
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        results = []
+        inputs = batch_input.predictions
+        # One matrix, one model call for the whole batch
+        predictions = (
+            (await run_prediction(model_predict, build_matrix(inputs))).astype(np.float64)
+            if inputs else np.empty(0)
+        )
+        power_max = np.fromiter((input_data.power_max for input_data in inputs),
+                                dtype=np.float64, count=len(inputs))
+        predicted_power, confidence = score_predictions(predictions, power_max)
         
-        for input_data in batch_input.predictions:
-            # Encode input
-            features = encode_input(input_data)
-            
-            # Make prediction
-            prediction = model.predict(features)[0]
-            predicted_power = max(0, float(prediction))
-            confidence = min(100, max(0, 100 - abs(predicted_power - input_data.power_max) / input_data.power_max * 50))
-            
-            results.append({
+        results = [
+            {
                 "appliance_id": input_data.appliance_id,
-                "predicted_power_w": round(predicted_power, 2),
-                "confidence": round(confidence, 2)
-            })
+                "predicted_power_w": power,
+                "confidence": conf
+            }
+            for input_data, power, conf in zip(
+                inputs, np.round(predicted_power, 2).tolist(), np.round(confidence, 2).tolist()
+            )
+        ]
         
         return {
             "count": len(results),
             "predictions": results,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": cached_iso()
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Batch prediction error: {str(e)}")
@@ -359,6 +546,31 @@ async def predict_batch(batch_input: BatchPredictionInput):
 # WASTE ANALYSIS ENDPOINTS
 # ============================================================================
 
+# Request occupancy_status (lowercased) -> reasoning engine status
+OCCUPANCY_MAP = {
+    "occupied": OccupancyStatus.OCCUPIED,
+    "unoccupied": OccupancyStatus.UNOCCUPIED,
+    "unknown": OccupancyStatus.UNKNOWN
+}
+
+
+def waste_prediction_input(input_data: WasteAnalysisInput) -> PredictionInput:
+    """Model input for a waste analysis request"""
+    return PredictionInput(
+        appliance_id=input_data.appliance_id,
+        appliance_category=input_data.appliance_category,
+        hour=input_data.hour,
+        day_of_week=input_data.day_of_week,
+        day_of_month=15,  # Use mid-month as default
+        month=input_data.month,
+        quarter=(input_data.month - 1) // 3 + 1,
+        is_weekend=input_data.is_weekend,
+        power_max=input_data.power_max,
+        power_rolling_mean_24=input_data.power_rolling_mean_24,
+        power_rolling_std_24=input_data.power_rolling_std_24,
+    )
+
+
 @app.post("/analyze-waste", response_model=WasteAnalysisOutput, tags=["Waste Analysis"])
 async def analyze_waste(input_data: WasteAnalysisInput):
     """
@@ -376,23 +588,13 @@ async def analyze_waste(input_data: WasteAnalysisInput):
     
     try:
         # Step 1: Get ML prediction for power disparity
-        pred_input = PredictionInput(
-            appliance_id=input_data.appliance_id,
-            appliance_category=input_data.appliance_category,
-            hour=input_data.hour,
-            day_of_week=input_data.day_of_week,
-            day_of_month=15,  # Use mid-month as default
-            month=input_data.month,
-            quarter=(input_data.month - 1) // 3 + 1,
-            is_weekend=input_data.is_weekend,
-            power_max=input_data.power_max,
-            power_rolling_mean_24=input_data.power_rolling_mean_24,
-            power_rolling_std_24=input_data.power_rolling_std_24,
-        )
+        pred_input = waste_prediction_input(input_data)
         
         # Encode and predict
-        features = encode_input(pred_input)
-        prediction = model.predict(features)[0]
+        if prediction_batcher.running:
+            prediction = await prediction_batcher.submit(pred_input)
+        else:
+            prediction = (await run_prediction(model_predict, encode_input(pred_input)))[0]
         predicted_disparity = max(0, float(prediction))
         confidence = min(1.0, max(0, 1.0 - abs(predicted_disparity - input_data.power_max) / (input_data.power_max + 1) * 0.5))
         
@@ -406,14 +608,8 @@ async def analyze_waste(input_data: WasteAnalysisInput):
         )
         
         # Step 3: Create occupancy context
-        occupancy_map = {
-            "occupied": OccupancyStatus.OCCUPIED,
-            "unoccupied": OccupancyStatus.UNOCCUPIED,
-            "unknown": OccupancyStatus.UNKNOWN
-        }
-        
         context = OccupancyContext(
-            occupancy_status=occupancy_map.get(input_data.occupancy_status.lower(), OccupancyStatus.UNKNOWN),
+            occupancy_status=OCCUPANCY_MAP.get(input_data.occupancy_status.lower(), OccupancyStatus.UNKNOWN),
             occupancy_confidence=input_data.occupancy_confidence,
             hour=input_data.hour,
             day_of_week=input_data.day_of_week,
@@ -427,16 +623,10 @@ async def analyze_waste(input_data: WasteAnalysisInput):
             context=context,
             appliance_category=input_data.appliance_category,
             location_description=input_data.location_description,
-            duration_hours=input_data.duration_hours
+            duration_hours=input_data.duration_hours,
+            cost_per_kwh=input_data.cost_per_kwh
         )
         
-        # Override cost if custom tariff provided
-        if input_data.cost_per_kwh != 8.0:
-            daily_loss = insight.estimated_waste_power_w / 1000.0 * 24 * input_data.cost_per_kwh
-            insight.estimated_daily_loss_inr = daily_loss
-            insight.estimated_monthly_loss_inr = daily_loss * 30
-            insight.estimated_annual_loss_inr = daily_loss * 365
-        
         # Step 5: Return JSON response
         return insight.to_dict()
     
@@ -456,25 +646,19 @@ async def analyze_waste_batch(batch_input: WasteAnalysisBatchInput):
         total_monthly = 0
         total_annual = 0
         
-        for input_data in batch_input.analyses:
+        # Predict every appliance with one model call; rows that fail to
+        # encode come back as exceptions and are skipped below
+        analyses = batch_input.analyses
+        predictions = (
+            await run_prediction(predict_queued, [waste_prediction_input(a) for a in analyses])
+            if analyses else []
+        )
+        
+        for input_data, prediction in zip(analyses, predictions):
             # Run analysis for each appliance
             try:
-                pred_input = PredictionInput(
-                    appliance_id=input_data.appliance_id,
-                    appliance_category=input_data.appliance_category,
-                    hour=input_data.hour,
-                    day_of_week=input_data.day_of_week,
-                    day_of_month=15,
-                    month=input_data.month,
-                    quarter=(input_data.month - 1) // 3 + 1,
-                    is_weekend=input_data.is_weekend,
-                    power_max=input_data.power_max,
-                    power_rolling_mean_24=input_data.power_rolling_mean_24,
-                    power_rolling_std_24=input_data.power_rolling_std_24,
-                )
-                
-                features = encode_input(pred_input)
-                prediction = model.predict(features)[0]
+                if isinstance(prediction, Exception):
+                    raise prediction
                 predicted_disparity = max(0, float(prediction))
                 confidence = min(1.0, max(0, 1.0 - abs(predicted_disparity - input_data.power_max) / (input_data.power_max + 1) * 0.5))
                 
@@ -486,14 +670,8 @@ async def analyze_waste_batch(batch_input: WasteAnalysisBatchInput):
                     variance_percent=(predicted_disparity / (input_data.baseline_power_w + 1)) * 100
                 )
                 
-                occupancy_map = {
-                    "occupied": OccupancyStatus.OCCUPIED,
-                    "unoccupied": OccupancyStatus.UNOCCUPIED,
-                    "unknown": OccupancyStatus.UNKNOWN
-                }
-                
                 context = OccupancyContext(
-                    occupancy_status=occupancy_map.get(input_data.occupancy_status.lower(), OccupancyStatus.UNKNOWN),
+                    occupancy_status=OCCUPANCY_MAP.get(input_data.occupancy_status.lower(), OccupancyStatus.UNKNOWN),
                     occupancy_confidence=input_data.occupancy_confidence,
                     hour=input_data.hour,
                     day_of_week=input_data.day_of_week,
@@ -506,15 +684,10 @@ async def analyze_waste_batch(batch_input: WasteAnalysisBatchInput):
                     context=context,
                     appliance_category=input_data.appliance_category,
                     location_description=input_data.location_description,
-                    duration_hours=input_data.duration_hours
+                    duration_hours=input_data.duration_hours,
+                    cost_per_kwh=input_data.cost_per_kwh
                 )
                 
-                if input_data.cost_per_kwh != 8.0:
-                    daily_loss = insight.estimated_waste_power_w / 1000.0 * 24 * input_data.cost_per_kwh
-                    insight.estimated_daily_loss_inr = daily_loss
-                    insight.estimated_monthly_loss_inr = daily_loss * 30
-                    insight.estimated_annual_loss_inr = daily_loss * 365
-                
                 insights.append(insight.to_dict())
                 
                 # Accumulate totals (only for non-normal waste)
@@ -534,75 +707,83 @@ async def analyze_waste_batch(batch_input: WasteAnalysisBatchInput):
             "total_daily_loss_inr": round(total_daily, 2),
             "total_monthly_loss_inr": round(total_monthly, 2),
             "total_annual_loss_inr": round(total_annual, 0),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": cached_iso()
         }
     
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Batch waste analysis error: {str(e)}")
 
 
+# Reasoning engine description, identical for every request
+WASTE_REASONING_INFO = {
+    "name": "AI-Based Energy Waste Detection & Reasoning Engine",
+    "version": "1.0.0",
+    "description": "Converts ML power disparity signals into explainable waste insights",
+    "waste_types": ["phantom_load", "post_occupancy", "inefficient_usage", "normal"],
+    "risk_levels": ["low", "medium", "high", "critical"],
+    "occupancy_modes": ["occupied", "unoccupied", "unknown"],
+    "default_tariff_inr_per_kwh": 8.0,
+    "cost_calculation": "waste_power_kw * 24 * tariff",
+    "features": {
+        "occupancy_based_classification": True,
+        "time_pattern_analysis": True,
+        "cost_impact_calculation": True,
+        "actionable_recommendations": True,
+        "explainability_reasoning": True
+    }
+}
+
+
 @app.get("/model/waste-reasoning", tags=["Model"])
 async def waste_reasoning_info():
     """Get information about the reasoning engine"""
     if reasoning_engine is None:
         raise HTTPException(status_code=503, detail="Reasoning engine not loaded")
     
-    return {
-        "name": "AI-Based Energy Waste Detection & Reasoning Engine",
-        "version": "1.0.0",
-        "description": "Converts ML power disparity signals into explainable waste insights",
-        "waste_types": ["phantom_load", "post_occupancy", "inefficient_usage", "normal"],
-        "risk_levels": ["low", "medium", "high", "critical"],
-        "occupancy_modes": ["occupied", "unoccupied", "unknown"],
-        "default_tariff_inr_per_kwh": 8.0,
-        "cost_calculation": "waste_power_kw * 24 * tariff",
-        "features": {
-            "occupancy_based_classification": True,
-            "time_pattern_analysis": True,
-            "cost_impact_calculation": True,
-            "actionable_recommendations": True,
-            "explainability_reasoning": True
-        }
-    }
+    return WASTE_REASONING_INFO
+
+
+@lru_cache(maxsize=256)
+def simulation_matrix(appliance_id: str, category: str, date: str) -> np.ndarray:
+    """24-row feature matrix for one appliance-day, identical except for the hour column"""
+    date_obj = datetime.strptime(date, "%Y-%m-%d")
+    day_of_week = date_obj.weekday()
+    month = date_obj.month
+    
+    template = PredictionInput(
+        appliance_id=appliance_id,
+        appliance_category=category,
+        hour=0,
+        day_of_week=day_of_week,
+        day_of_month=date_obj.day,
+        month=month,
+        quarter=(month - 1) // 3 + 1,
+        is_weekend=1 if day_of_week >= 5 else 0,
+        power_max=2500.0,
+        power_rolling_mean_24=1000.0,
+        power_rolling_std_24=500.0
+    )
+    
+    X = np.repeat(build_matrix([template]), 24, axis=0)
+    X[:, FEATURE_INDEX['hour']] = np.arange(24)
+    X.flags.writeable = False
+    return X
+
+
 async def simulate_hourly(appliance_id: str, category: str, date: str = "2021-06-15"):
     """Simulate predictions for an entire day (24 hours)"""
     if model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        from datetime import datetime as dt
+        X = simulation_matrix(appliance_id, category, date)
         
-        date_obj = dt.strptime(date, "%Y-%m-%d")
-        day_of_week = date_obj.weekday()
-        day_of_month = date_obj.day
-        month = date_obj.month
-        quarter = (month - 1) // 3 + 1
-        is_weekend = 1 if day_of_week >= 5 else 0
-        
-        hourly_predictions = []
-        
-        for hour in range(24):
-            input_data = PredictionInput(
-                appliance_id=appliance_id,
-                appliance_category=category,
-                hour=hour,
-                day_of_week=day_of_week,
-                day_of_month=day_of_month,
-                month=month,
-                quarter=quarter,
-                is_weekend=is_weekend,
-                power_max=2500.0,
-                power_rolling_mean_24=1000.0,
-                power_rolling_std_24=500.0
-            )
-            
-            features = encode_input(input_data)
-            prediction = model.predict(features)[0]
-            
-            hourly_predictions.append({
-                "hour": hour,
-                "predicted_power_w": round(max(0, float(prediction)), 2)
-            })
+        predictions = await run_prediction(model_predict, X)
+        predicted_power = np.round(np.maximum(predictions.astype(np.float64), 0), 2)
+        hourly_predictions = [
+            {"hour": hour, "predicted_power_w": power}
+            for hour, power in enumerate(predicted_power.tolist())
+        ]
         
         return {
             "appliance_id": appliance_id,
@@ -624,14 +805,13 @@ try:
     from data_ingestion_agent import DataIngestionAgent, DataSourceType
     from pattern_analysis_agent import PatternAnalysisAgent
     from learning_adaptation_agent import LearningAdaptationAgent
-    from alert_recommendation_system import AlertGenerator, AlertSeverity
+    from alert_recommendation_system import AlertGenerator, AlertSeverity, format_timestamp_ns
     data_ingestion = DataIngestionAgent()
     pattern_analyzer = PatternAnalysisAgent()
     learning_agent = LearningAdaptationAgent("BUILDING_01")
     alert_generator = AlertGenerator(cost_per_kwh_inr=8.0)
     print("✓ Data ingestion agents initialized")
 except Exception as e:
-    import traceback
     print(f"⚠ Warning: Could not load agents: {e}")
     traceback.print_exc()
     data_ingestion = None
@@ -694,26 +874,19 @@ async def analyze_building(input_data: BuildingAnalysisInput):
         total_monthly_loss = 0
         total_annual_loss = 0
         
+        # Get ML predictions for every appliance with one model call; rows
+        # that fail to encode come back as exceptions and are skipped below
+        appliances = input_data.analyses
+        predictions = (
+            await run_prediction(predict_queued, [waste_prediction_input(a) for a in appliances])
+            if appliances else []
+        )
+        
         # Analyze each appliance
-        for appliance in input_data.analyses:
+        for appliance, prediction in zip(appliances, predictions):
             try:
-                # Get ML prediction
-                pred_input = PredictionInput(
-                    appliance_id=appliance.appliance_id,
-                    appliance_category=appliance.appliance_category,
-                    hour=appliance.hour,
-                    day_of_week=appliance.day_of_week,
-                    day_of_month=15,
-                    month=appliance.month,
-                    quarter=(appliance.month - 1) // 3 + 1,
-                    is_weekend=appliance.is_weekend,
-                    power_max=appliance.power_max,
-                    power_rolling_mean_24=appliance.power_rolling_mean_24,
-                    power_rolling_std_24=appliance.power_rolling_std_24,
-                )
-                
-                features = encode_input(pred_input)
-                prediction = model.predict(features)[0]
+                if isinstance(prediction, Exception):
+                    raise prediction
                 predicted_disparity = max(0, float(prediction))
                 confidence = min(1.0, max(0, 1.0 - abs(predicted_disparity - appliance.power_max) / (appliance.power_max + 1) * 0.5))
                 
@@ -725,14 +898,8 @@ async def analyze_building(input_data: BuildingAnalysisInput):
                     variance_percent=(predicted_disparity / (appliance.baseline_power_w + 1)) * 100
                 )
                 
-                occupancy_map = {
-                    "occupied": OccupancyStatus.OCCUPIED,
-                    "unoccupied": OccupancyStatus.UNOCCUPIED,
-                    "unknown": OccupancyStatus.UNKNOWN
-                }
-                
                 context = OccupancyContext(
-                    occupancy_status=occupancy_map.get(appliance.occupancy_status.lower(), OccupancyStatus.UNKNOWN),
+                    occupancy_status=OCCUPANCY_MAP.get(appliance.occupancy_status.lower(), OccupancyStatus.UNKNOWN),
                     occupancy_confidence=appliance.occupancy_confidence,
                     hour=appliance.hour,
                     day_of_week=appliance.day_of_week,
@@ -745,16 +912,10 @@ async def analyze_building(input_data: BuildingAnalysisInput):
                     context=context,
                     appliance_category=appliance.appliance_category,
                     location_description=appliance.location_description,
-                    duration_hours=appliance.duration_hours
+                    duration_hours=appliance.duration_hours,
+                    cost_per_kwh=input_data.tariff_inr_per_kwh
                 )
                 
-                # Override cost if custom tariff provided
-                if input_data.tariff_inr_per_kwh != 8.0:
-                    daily_loss = insight.estimated_waste_power_w / 1000.0 * 24 * input_data.tariff_inr_per_kwh
-                    insight.estimated_daily_loss_inr = daily_loss
-                    insight.estimated_monthly_loss_inr = daily_loss * 30
-                    insight.estimated_annual_loss_inr = daily_loss * 365
-                
                 analyses.append(insight.to_dict())
                 
                 # Generate alert if significant waste
@@ -794,7 +955,7 @@ async def analyze_building(input_data: BuildingAnalysisInput):
         
         return {
             "building_id": input_data.building_id,
-            "analysis_date": datetime.now().isoformat(),
+            "analysis_date": cached_iso(),
             "appliances_analyzed": len(analyses),
             "total_appliances": len(input_data.analyses),
             "alerts_generated": len(alerts_generated),
@@ -880,16 +1041,13 @@ async def acknowledge_alert(alert_id: str, assigned_to: Optional[str] = None):
     if alert_id not in alert_generator.alerts:
         raise HTTPException(status_code=404, detail=f"Alert not found: {alert_id}")
     
-    alert = alert_generator.alerts[alert_id]
-    alert.status = "acknowledged"
-    alert.assigned_to = assigned_to
-    alert.updated_at = datetime.now()
+    alert = alert_generator.update_alert_status(alert_id, "acknowledged", assigned_to=assigned_to)
     
     return {
         "alert_id": alert_id,
         "status": "acknowledged",
         "assigned_to": assigned_to,
-        "updated_at": alert.updated_at.isoformat()
+        "updated_at": format_timestamp_ns(alert.updated_at)
     }
 
 
@@ -905,16 +1063,10 @@ async def list_recommendations(alert_id: Optional[str] = None, status: Optional[
     if alert_generator is None:
         raise HTTPException(status_code=503, detail="Recommendation system not initialized")
     
-    recs = list(alert_generator.recommendations.values())
-    
-    if alert_id:
-        recs = [r for r in recs if r.alert_id == alert_id]
+    recs = alert_generator.filter_recommendations(alert_id=alert_id, status=status)
     
-    if status:
-        recs = [r for r in recs if r.status == status]
-    
-    # Sort by payback period (quickest ROI first)
-    recs = sorted(recs, key=lambda r: r.payback_period_months)
+    # Sort by payback period (quickest ROI first), oldest recommendation first on ties
+    recs = sorted(recs, key=lambda r: (r.payback_period_months, r.recommendation_id))
     
     return {
         "total": len(recs),
@@ -931,10 +1083,7 @@ async def approve_recommendation(rec_id: str, approved_by: str):
     if rec_id not in alert_generator.recommendations:
         raise HTTPException(status_code=404, detail=f"Recommendation not found: {rec_id}")
     
-    rec = alert_generator.recommendations[rec_id]
-    rec.status = "approved"
-    rec.approved_by = approved_by
-    rec.approval_date = datetime.now()
+    rec = alert_generator.approve_recommendation(rec_id, approved_by)
     
     return {
         "recommendation_id": rec_id,
@@ -984,13 +1133,12 @@ async def upload_csv_file(file: UploadFile = File(...)):
         raise HTTPException(status_code=503, detail="Services not initialized")
     
     try:
-        import tempfile
-        import os
-        
-        # Save uploaded file to temporary location
+        # Save uploaded file to temporary location, copying in 1 MiB blocks
+        # off the event loop rather than holding the whole upload in memory
         with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp_file:
-            contents = await file.read()
-            tmp_file.write(contents)
+            await asyncio.get_running_loop().run_in_executor(
+                None, shutil.copyfileobj, file.file, tmp_file, 1024 * 1024
+            )
             tmp_path = tmp_file.name
         
         try:
@@ -10,6 +10,9 @@ from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
+# Rows per read_csv chunk when streaming an appliance file into SQLite
+CHUNK_ROWS = 200_000
+
 class ApplianceDataConsolidator:
     def __init__(self, archive_dir, output_dir):
         self.archive_dir = Path(archive_dir)
@@ -30,33 +33,71 @@ class ApplianceDataConsolidator:
         return csv_files
     
     def load_appliance_metadata(self):
-        """Load the metadata file containing appliance info"""
+        """Load the metadata file and index the appliance info by file name"""
         metadata_path = self.archive_dir / "0_smart_plugs_devices.csv"
         try:
             metadata = pd.read_csv(metadata_path)
+            metadata_index = self.build_metadata_index(metadata)
             print(f"✓ Loaded metadata: {len(metadata)} appliances")
-            return metadata
+            return metadata_index
         except Exception as e:
             print(f"⚠ Could not load metadata: {e}")
-            return None
-    
-    def get_appliance_info_from_metadata(self, filename, metadata):
-        """Extract appliance info from metadata"""
-        if metadata is None:
             return {}
+    
+    @staticmethod
+    def build_metadata_index(metadata):
+        """Map each file name to its appliance info (first matching row wins)"""
+        positions = {}
+        for position, filename in enumerate(metadata['files_names']):
+            positions.setdefault(filename, position)
         
-        # Find the row matching this filename
-        matching_rows = metadata[metadata['files_names'] == filename]
-        if len(matching_rows) > 0:
-            row = matching_rows.iloc[0]
-            return {
+        index = {}
+        for filename, position in positions.items():
+            row = metadata.iloc[position]
+            index[filename] = {
                 'appliance_id': row.get('id', ''),
                 'appliance_name': row.get('plug_name', ''),
                 'appliance_category': row.get('appliance_category', ''),
                 'power_max': row.get('power_max', '')
             }
+        return index
+    
+    @staticmethod
+    def get_appliance_info_from_metadata(filename, metadata_index):
+        """Extract appliance info from the metadata index"""
+        return metadata_index.get(filename, {})
+    
+    @staticmethod
+    def add_appliance_columns(df, csv_file, app_info):
+        """Add the appliance info columns to a frame read from csv_file"""
+        df['appliance_id'] = app_info.get('appliance_id', csv_file.stem)
+        df['appliance_name'] = app_info.get('appliance_name', csv_file.stem.replace('_', ' ').title())
+        df['appliance_category'] = app_info.get('appliance_category', 'unknown')
+        df['power_max'] = app_info.get('power_max', '')
+        return df
+    
+    @staticmethod
+    def detect_reading_columns(df):
+        """Find the (timestamp, power) column names; either may be None"""
+        # Standardize column names (assuming power consumption column)
+        # Common column names: 'power', 'Power', 'consumption', 'Consumption', etc.
+        power_col = None
+        timestamp_col = None
+        
+        for col in df.columns:
+            col_lower = col.lower()
+            if col_lower in ['power', 'consumption', 'watts', 'w']:
+                power_col = col
+            if col_lower in ['timestamp', 'time', 'datetime', 'ts', 'date_time']:
+                timestamp_col = col
+        
+        # If columns not found, use first two columns (assume first is timestamp, second is power)
+        if not power_col or not timestamp_col:
+            if len(df.columns) >= 3:  # At least timestamp and power
+                timestamp_col = df.columns[0]
+                power_col = df.columns[1]
         
-        return {}
+        return timestamp_col, power_col
     
     def consolidate_to_sqlite(self):
         """Consolidate all CSV files into SQLite database"""
@@ -65,7 +106,7 @@ class ApplianceDataConsolidator:
         print("="*70)
         
         # Load metadata
-        metadata = self.load_appliance_metadata()
+        metadata_index = self.load_appliance_metadata()
         
         # Get all appliance CSV files
         csv_files = self.get_appliance_files()
@@ -75,6 +116,13 @@ class ApplianceDataConsolidator:
         conn = sqlite3.connect(str(self.db_path))
         cursor = conn.cursor()
         
+        # Bulk-load settings: the database is rebuilt from the CSVs, so skip
+        # fsyncs and keep the journal and temp structures cheap while loading
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=OFF')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('PRAGMA cache_size=-200000')
+        
         # Create main table for consolidated data
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS appliance_readings (
@@ -100,6 +148,10 @@ class ApplianceDataConsolidator:
             )
         ''')
         
+        # Indexes are (re)built once after loading rather than updated per row
+        cursor.execute('DROP INDEX IF EXISTS idx_appliance_id')
+        cursor.execute('DROP INDEX IF EXISTS idx_timestamp')
+        
         total_rows = 0
         successful_files = 0
         failed_files = 0
@@ -109,52 +161,35 @@ class ApplianceDataConsolidator:
             try:
                 print(f"[{idx}/{len(csv_files)}] Processing {csv_file.name}...", end=" ")
                 
-                # Load CSV
-                df = pd.read_csv(csv_file)
-                
                 # Get appliance info from metadata
-                app_info = self.get_appliance_info_from_metadata(csv_file.name, metadata)
-                
-                # Add appliance info columns
-                df['appliance_id'] = app_info.get('appliance_id', csv_file.stem)
-                df['appliance_name'] = app_info.get('appliance_name', csv_file.stem.replace('_', ' ').title())
-                df['appliance_category'] = app_info.get('appliance_category', 'unknown')
-                df['power_max'] = app_info.get('power_max', '')
-                
-                # Standardize column names (assuming power consumption column)
-                # Common column names: 'power', 'Power', 'consumption', 'Consumption', etc.
-                power_col = None
-                timestamp_col = None
+                app_info = self.get_appliance_info_from_metadata(csv_file.name, metadata_index)
                 
-                for col in df.columns:
-                    col_lower = col.lower()
-                    if col_lower in ['power', 'consumption', 'watts', 'w']:
-                        power_col = col
-                    if col_lower in ['timestamp', 'time', 'datetime', 'ts', 'date_time']:
-                        timestamp_col = col
-                
-                # If columns not found, use first two columns (assume first is timestamp, second is power)
-                if not power_col or not timestamp_col:
-                    if len(df.columns) >= 3:  # At least timestamp and power
-                        timestamp_col = df.columns[0]
-                        power_col = df.columns[1]
+                # Identify the timestamp/power columns from the header alone
+                header = self.add_appliance_columns(pd.read_csv(csv_file, nrows=0), csv_file, app_info)
+                timestamp_col, power_col = self.detect_reading_columns(header)
                 
                 if power_col and timestamp_col:
-                    # Rename to standard names
-                    df.rename(columns={
-                        timestamp_col: 'timestamp',
-                        power_col: 'power_reading'
-                    }, inplace=True)
-                    
-                    # Select relevant columns
-                    select_cols = ['appliance_id', 'appliance_name', 'appliance_category', 
-                                  'power_max', 'timestamp', 'power_reading']
-                    
-                    available_cols = [col for col in select_cols if col in df.columns]
-                    df = df[available_cols]
-                    
-                    # Insert into database
-                    df.to_sql('appliance_readings', conn, if_exists='append', index=False)
+                    # Stream the file in chunks so memory stays bounded for large exports
+                    row_count = 0
+                    for df in pd.read_csv(csv_file, chunksize=CHUNK_ROWS):
+                        df = self.add_appliance_columns(df, csv_file, app_info)
+                        
+                        # Rename to standard names
+                        df.rename(columns={
+                            timestamp_col: 'timestamp',
+                            power_col: 'power_reading'
+                        }, inplace=True)
+                        
+                        # Select relevant columns
+                        select_cols = ['appliance_id', 'appliance_name', 'appliance_category', 
+                                      'power_max', 'timestamp', 'power_reading']
+                        
+                        available_cols = [col for col in select_cols if col in df.columns]
+                        df = df[available_cols]
+                        
+                        # Insert into database
+                        df.to_sql('appliance_readings', conn, if_exists='append', index=False)
+                        row_count += len(df)
                     
                     # Update metadata table
                     cursor.execute('''
@@ -167,12 +202,12 @@ class ApplianceDataConsolidator:
                         app_info.get('appliance_category', 'unknown'),
                         app_info.get('power_max', ''),
                         csv_file.name,
-                        len(df)
+                        row_count
                     ))
                     
-                    total_rows += len(df)
+                    total_rows += row_count
                     successful_files += 1
-                    print(f"✓ {len(df):,} rows")
+                    print(f"✓ {row_count:,} rows")
                 else:
                     print("⚠ Could not identify timestamp/power columns")
                     failed_files += 1
@@ -193,6 +228,8 @@ class ApplianceDataConsolidator:
         except Exception as e:
             print(f"Note: Indexing skipped or delayed: {e}")
         
+        # Leave a single-file database behind, as before the bulk load
+        cursor.execute('PRAGMA journal_mode=DELETE')
         conn.close()
         
         print("\n" + "="*70)
@@ -221,6 +221,7 @@ class EnergyWasteReasoningEngine:
         appliance_category: str,
         location_description: str = "",
         duration_hours: float = 1.0,
+        cost_per_kwh: Optional[float] = None,
     ) -> EnergyWasteInsight:
         """
         Main analysis function: Convert signal + context → waste insight.
@@ -231,10 +232,13 @@ class EnergyWasteReasoningEngine:
             appliance_category: Type of appliance (e.g., "lighting", "hvac", "server")
             location_description: Human-readable location (e.g., "Office Zone A")
             duration_hours: How long has this been going on
+            cost_per_kwh: Tariff in ₹/kWh for this insight (default: the engine's tariff)
             
         Returns:
             EnergyWasteInsight with waste type, cost impact, and recommendations
         """
+        if cost_per_kwh is None:
+            cost_per_kwh = self.cost_per_kwh
         
         # Step 1: Classify waste type based on signal + context
         waste_type, occupancy_mismatch = self._classify_waste_type(
@@ -252,7 +256,7 @@ class EnergyWasteReasoningEngine:
         )
         
         daily_loss, monthly_loss, annual_loss = self._calculate_cost_impact(
-            estimated_waste_power, duration_hours
+            estimated_waste_power, duration_hours, cost_per_kwh
         )
         
         # Step 4: Generate explainability chain
@@ -287,7 +291,7 @@ class EnergyWasteReasoningEngine:
             estimated_waste_power_w=estimated_waste_power,
             duration_hours=duration_hours,
             total_wasted_kwh=(estimated_waste_power / 1000.0) * duration_hours,
-            cost_per_kwh=self.cost_per_kwh,
+            cost_per_kwh=cost_per_kwh,
             estimated_daily_loss_inr=daily_loss,
             estimated_monthly_loss_inr=monthly_loss,
             estimated_annual_loss_inr=annual_loss,
@@ -383,7 +387,8 @@ class EnergyWasteReasoningEngine:
     def _calculate_cost_impact(
         self,
         waste_power_w: float,
-        duration_hours: float
+        duration_hours: float,
+        cost_per_kwh: float
     ) -> Tuple[float, float, float]:
         """Calculate financial impact in ₹"""
         
@@ -394,7 +399,7 @@ class EnergyWasteReasoningEngine:
         daily_kwh = waste_power_kw * 24  # Full day extrapolation
         
         # Cost
-        daily_cost = daily_kwh * self.cost_per_kwh
+        daily_cost = daily_kwh * cost_per_kwh
         monthly_cost = daily_cost * 30
         annual_cost = daily_cost * 365
         
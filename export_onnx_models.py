@@ -0,0 +1,79 @@
+"""
+Export the trained models to ONNX for ONNX Runtime inference
+Run once after training; app.py and serve_model.py load the .onnx files
+automatically when onnxruntime is installed.
+
+Requires: onnxruntime, onnxmltools (XGBoost energy model), skl2onnx (disparity model)
+"""
+
+import json
+from pathlib import Path
+import joblib
+import numpy as np
+
+from onnx_inference import load_onnx_regressor
+
+MODEL_DIR = Path(__file__).parent / "models"
+
+
+def export_energy_model():
+    """Convert the XGBoost energy model, keeping only the early-stopped trees"""
+    from onnxmltools import convert_xgboost
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    model = joblib.load(MODEL_DIR / "xgb_energy_model.pkl")
+    feature_names = joblib.load(MODEL_DIR / "feature_names.pkl")
+
+    booster = model.get_booster()
+    try:
+        booster = booster[: model.best_iteration + 1]
+    except AttributeError:
+        pass
+    # The converter parses tree dumps that reference features as f0..fN
+    booster.feature_names = None
+
+    onnx_model = convert_xgboost(
+        booster, initial_types=[("features", FloatTensorType([None, len(feature_names)]))]
+    )
+    output_path = MODEL_DIR / "xgb_energy_model.onnx"
+    output_path.write_bytes(onnx_model.SerializeToString())
+
+    X = np.random.default_rng(0).uniform(0, 3000, size=(256, len(feature_names))).astype(np.float32)
+    return output_path, booster.inplace_predict(X), X
+
+
+def export_disparity_model():
+    """Convert the GradientBoosting disparity model (input is the scaled feature matrix)"""
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    model = joblib.load(MODEL_DIR / "power_disparity_model.pkl")
+    with open(MODEL_DIR / "feature_names.json", "r") as f:
+        n_features = len(json.load(f))
+
+    onnx_model = convert_sklearn(
+        model, initial_types=[("features", FloatTensorType([None, n_features]))]
+    )
+    output_path = MODEL_DIR / "power_disparity_model.onnx"
+    output_path.write_bytes(onnx_model.SerializeToString())
+
+    X = np.random.default_rng(0).standard_normal((256, n_features)).astype(np.float32)
+    return output_path, model.predict(X), X
+
+
+def main():
+    print("\n" + "="*80)
+    print("ONNX MODEL EXPORT")
+    print("="*80)
+
+    for export in (export_energy_model, export_disparity_model):
+        output_path, expected, X = export()
+        actual = load_onnx_regressor(output_path).predict(X)
+        max_error = float(np.max(np.abs(actual - expected)))
+        print(f"✓ {output_path.name}: max abs difference vs. original {max_error:.6f}")
+
+    print("="*80 + "\n")
+
+
+if __name__ == "__main__":
+    main()
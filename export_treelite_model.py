@@ -0,0 +1,58 @@
+"""
+Compile the XGBoost energy model into a native shared library with Treelite
+Run once after training (needs gcc); app.py loads the library automatically
+when TL2cgen is installed.
+
+Requires: treelite, tl2cgen
+"""
+
+from pathlib import Path
+import joblib
+import numpy as np
+
+from treelite_inference import load_treelite_predictor
+
+MODEL_DIR = Path(__file__).parent / "models"
+
+
+def export_energy_model():
+    """Generate C code for the early-stopped trees and build it with gcc"""
+    import treelite
+    import tl2cgen
+
+    model = joblib.load(MODEL_DIR / "xgb_energy_model.pkl")
+    feature_names = joblib.load(MODEL_DIR / "feature_names.pkl")
+
+    booster = model.get_booster()
+    try:
+        booster = booster[: model.best_iteration + 1]
+    except AttributeError:
+        pass
+
+    output_path = MODEL_DIR / "xgb_energy_model.so"
+    tl2cgen.export_lib(
+        treelite.frontend.from_xgboost(booster),
+        toolchain="gcc",
+        libpath=output_path,
+        params={"parallel_comp": 32, "quantize": 1},
+    )
+
+    X = np.random.default_rng(0).uniform(0, 3000, size=(256, len(feature_names))).astype(np.float32)
+    return output_path, booster.inplace_predict(X), X
+
+
+def main():
+    print("\n" + "="*80)
+    print("TREELITE MODEL EXPORT")
+    print("="*80)
+
+    output_path, expected, X = export_energy_model()
+    actual = load_treelite_predictor(output_path).predict(X)
+    max_error = float(np.max(np.abs(actual - expected)))
+    print(f"✓ {output_path.name}: max abs difference vs. original {max_error:.6f}")
+
+    print("="*80 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Micro-Batcher
+Coalesces concurrent single-row prediction requests into one model call.
+
+Each request is queued together with a future; a background task drains the
+queue until MAX_BATCH items are collected or MAX_LATENCY_MS has elapsed since
+the first item arrived, runs the handler once for the whole batch and
+resolves every future with its own result. The handler runs on an
+executor thread so the event loop keeps accepting requests meanwhile.
+Results can be memoized per item in a bounded LRU, so repeated identical
+requests skip the queue entirely.
+"""
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional, Sequence
+
+MAX_BATCH = 64
+MAX_LATENCY_MS = 5.0
+CACHE_SIZE = 8192
+
+
+class MicroBatcher:
+    """Asyncio dynamic batcher in front of a vectorized predict function.
+
+    ``handler`` receives the list of queued items and returns one entry per
+    item, in order. An entry that is an ``Exception`` instance is raised to
+    that item's caller only, so a bad row does not fail its batch-mates.
+    ``executor`` runs the handler; None means the loop's default executor.
+    With ``cache_size`` > 0, successful results are cached keyed on the item
+    itself, which must then be hashable; call ``clear_cache`` whenever the
+    model behind ``handler`` changes.
+    """
+
+    def __init__(self, handler: Callable[[List[Any]], Sequence[Any]],
+                 max_batch: int = MAX_BATCH, max_latency_ms: float = MAX_LATENCY_MS,
+                 executor: Optional[Executor] = None, cache_size: int = 0):
+        self.handler = handler
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000.0
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Any, Any]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the background batching task on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Cancel the batching task, failing any requests still queued"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._fail(pending, RuntimeError("Prediction batcher stopped"))
+
+    @staticmethod
+    def _fail(batch: list, error: Exception):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def clear_cache(self):
+        """Forget all memoized results"""
+        self._cache.clear()
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result"""
+        if self.cache_size:
+            try:
+                self._cache.move_to_end(item)
+                return self._cache[item]
+            except KeyError:
+                pass
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        result = await future
+        if self.cache_size:
+            self._cache[item] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_latency
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Drop requests whose client has already gone away
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self.handler, [item for item, _ in batch]
+                )
+            except asyncio.CancelledError:
+                self._fail(batch, RuntimeError("Prediction batcher stopped"))
+                raise
+            except Exception as e:
+                self._fail(batch, e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
@@ -0,0 +1,44 @@
+"""
+ONNX Runtime Inference
+Optional compiled-graph backend for the tree-ensemble regressors.
+
+When onnxruntime is installed and an exported .onnx file sits next to the
+pickled model (see export_onnx_models.py), the API servers predict through
+an ONNX Runtime session instead of the XGBoost / scikit-learn tree walkers.
+Otherwise load_onnx_regressor returns None and the pickled model is used.
+"""
+
+from pathlib import Path
+from typing import Optional
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+
+class OnnxRegressor:
+    """Thin predict() wrapper around a single-input, single-output ONNX session"""
+
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+        self.output_names = [session.get_outputs()[0].name]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        return self.session.run(self.output_names, {self.input_name: X})[0].ravel()
+
+
+def load_onnx_regressor(path: Path, intra_op_threads: int = 0) -> Optional[OnnxRegressor]:
+    """Open an exported model with full graph optimization, if available"""
+    if ort is None or not path.exists():
+        return None
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = intra_op_threads
+    session = ort.InferenceSession(str(path), sess_options=options,
+                                   providers=["CPUExecutionProvider"])
+    return OnnxRegressor(session)
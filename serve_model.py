@@ -5,23 +5,37 @@ Serves predictions from the saved model with full REST API
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, List, Optional
 import joblib
 import json
+import os
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 from datetime import datetime
+from functools import lru_cache
+import time
+from micro_batcher import CACHE_SIZE, MicroBatcher
+from onnx_inference import load_onnx_regressor
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; responses fall back to the stdlib encoder
+    orjson = None
+
 # Configuration
 MODEL_DIR = Path(__file__).parent / "models"
 app = FastAPI(
     title="Power Disparity Predictor API",
     description="Real-time power consumption disparity prediction",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
 )
 
 # CORS middleware
@@ -35,13 +49,52 @@ app.add_middleware(
 
 # Global model state
 model = None
+onnx_model = None
 scaler = None
+scaler_mean = None
+scaler_scale = None
 label_encoders = None
+label_maps = {}
 feature_names = None
 model_ready = False
 
+# Source expression for each model feature, read off a request ``d``;
+# unknown appliance ids / categories encode as 0
+FEATURE_EXPRESSIONS = {
+    "hour": "d.hour",
+    "day_of_week": "d.day_of_week",
+    "day_of_month": "d.day_of_month",
+    "month": "d.month",
+    "is_weekend": "d.is_weekend",
+    "appliance_id_encoded": "id_codes.get(d.appliance_id, 0)",
+    "appliance_category_encoded": "category_codes.get(d.appliance_category, 0)",
+    "power_reading": "d.power_reading",
+    "power_max": "d.power_max",
+    "power_std_6h": "d.power_std_6h",
+    "power_mean_6h": "d.power_mean_6h",
+    "power_std_12h": "d.power_std_12h",
+    "power_mean_12h": "d.power_mean_12h",
+    "power_std_24h": "d.power_std_24h",
+    "power_mean_24h": "d.power_mean_24h",
+}
+
+def compile_row_builder(names):
+    """Generate build_rows(requests, id_codes, category_codes) returning row tuples in model column order"""
+    row = ", ".join(FEATURE_EXPRESSIONS[name] for name in names)
+    source = (
+        "def build_rows(requests, id_codes, category_codes):\n"
+        f"    return [({row},) for d in requests]\n"
+    )
+    namespace = {}
+    exec(source, namespace)
+    return namespace["build_rows"]
+
+build_rows = compile_row_builder(list(FEATURE_EXPRESSIONS))
+
 # Pydantic models
 class PredictionRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     hour: int = Field(..., ge=0, le=23, description="Hour of day (0-23)")
     day_of_week: int = Field(..., ge=0, le=6, description="Day of week (0-6)")
     day_of_month: int = Field(..., ge=1, le=31, description="Day of month")
@@ -74,7 +127,7 @@ class HealthResponse(BaseModel):
 
 def load_model_artifacts():
     """Load saved model and artifacts"""
-    global model, scaler, label_encoders, feature_names, model_ready
+    global model, onnx_model, scaler, scaler_mean, scaler_scale, label_encoders, label_maps, feature_names, model_ready, build_rows
     
     try:
         if not MODEL_DIR.exists():
@@ -91,17 +144,28 @@ def load_model_artifacts():
             return False
         
         model = joblib.load(model_file)
+        onnx_model = load_onnx_regressor(MODEL_DIR / "power_disparity_model.onnx", intra_op_threads=1)
         scaler = joblib.load(scaler_file)
+        scaler_mean = scaler.mean_.astype(np.float32)
+        scaler_scale = scaler.scale_.astype(np.float32)
         label_encoders = joblib.load(encoders_file)
+        label_maps = build_label_maps(label_encoders)
         
         with open(features_file, 'r') as f:
             feature_names = json.load(f)
+        build_rows = compile_row_builder(feature_names)
+        prediction_batcher.clear_cache()
+        model_summary.cache_clear()
+        appliance_summary.cache_clear()
+        # Warm up the predictor so lazy backend setup is not paid by the first request
+        model_predict(np.zeros((1, len(feature_names)), dtype=np.float32))
         
         model_ready = True
         
         print("✅ Model loaded successfully!")
         print(f"   Features: {len(feature_names)}")
         print(f"   Model Type: GradientBoostingRegressor")
+        print(f"   Backend: {'ONNX Runtime' if onnx_model is not None else 'scikit-learn'}")
         print(f"   Status: Ready for predictions")
         
         return True
@@ -110,30 +174,50 @@ def load_model_artifacts():
         print(f"❌ Error loading model: {e}")
         return False
 
+# Response timestamps are formatted at most once per second
+_LAST_ISO = (0, "")
+
+def cached_iso() -> str:
+    """Current local time as an ISO string, truncated to the second"""
+    global _LAST_ISO
+    t = int(time.time())
+    if t != _LAST_ISO[0]:
+        _LAST_ISO = (t, datetime.fromtimestamp(t).isoformat())
+    return _LAST_ISO[1]
+
 @app.on_event("startup")
 async def startup():
     """Load model on server startup"""
     print("\n" + "="*80)
     print("POWER DISPARITY PREDICTION SERVER - STARTING")
     print("="*80)
-    load_model_artifacts()
+    if load_model_artifacts():
+        prediction_batcher.start()
     print("="*80 + "\n")
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the prediction batcher"""
+    await prediction_batcher.stop()
+
+# Root endpoint payload, identical for every request
+ROOT_INFO = {
+    "api": "Power Disparity Prediction",
+    "version": "1.0.0",
+    "status": "running",
+    "docs": "/docs",
+    "endpoints": {
+        "health": "GET /health",
+        "predict": "POST /predict",
+        "batch_predict": "POST /predict/batch",
+        "model_info": "GET /model/info"
+    }
+}
+
 @app.get("/", tags=["Info"])
 async def root():
     """API root endpoint"""
-    return {
-        "api": "Power Disparity Prediction",
-        "version": "1.0.0",
-        "status": "running",
-        "docs": "/docs",
-        "endpoints": {
-            "health": "GET /health",
-            "predict": "POST /predict",
-            "batch_predict": "POST /predict/batch",
-            "model_info": "GET /model/info"
-        }
-    }
+    return ROOT_INFO
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
@@ -144,12 +228,9 @@ async def health_check():
         "ready_for_predictions": model_ready
     }
 
-@app.get("/model/info", tags=["Model"])
-async def model_info():
-    """Get model information"""
-    if not model_ready:
-        raise HTTPException(status_code=503, detail="Model not loaded")
-    
+@lru_cache(maxsize=1)
+def model_summary() -> dict:
+    """Model information payload, rebuilt only when the model is reloaded"""
     return {
         "model_type": "GradientBoostingRegressor",
         "features": feature_names,
@@ -164,51 +245,69 @@ async def model_info():
         ]
     }
 
-def encode_input(request: PredictionRequest):
-    """Encode categorical features"""
+@app.get("/model/info", tags=["Model"])
+async def model_info():
+    """Get model information"""
+    if not model_ready:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    return model_summary()
+
+def build_label_maps(encoders):
+    """Precompute {class: code} lookups so encoding avoids LabelEncoder.transform"""
+    return {
+        column: {label: code for code, label in enumerate(encoder.classes_.tolist())}
+        for column, encoder in encoders.items()
+    }
+
+def build_matrix(requests: List[PredictionRequest]):
+    """Assemble the (n, n_features) model input directly from request objects"""
     try:
-        # Encode appliance_id
-        if 'appliance_id' in label_encoders:
-            try:
-                appliance_encoded = label_encoders['appliance_id'].transform([request.appliance_id])[0]
-            except:
-                # Use 0 if unknown
-                appliance_encoded = 0
-        else:
-            appliance_encoded = 0
-        
-        # Encode appliance_category
-        if 'appliance_category' in label_encoders:
-            try:
-                category_encoded = label_encoders['appliance_category'].transform([request.appliance_category])[0]
-            except:
-                category_encoded = 0
-        else:
-            category_encoded = 0
-        
-        # Create feature vector in correct order
-        features = np.array([[
-            request.hour,
-            request.day_of_week,
-            request.day_of_month,
-            request.month,
-            request.is_weekend,
-            appliance_encoded,
-            category_encoded,
-            request.power_reading,
-            request.power_max,
-            request.power_std_6h,
-            request.power_mean_6h,
-            request.power_std_12h,
-            request.power_mean_12h,
-            request.power_std_24h,
-            request.power_mean_24h
-        ]])
-        
-        return features
+        rows = build_rows(requests, label_maps.get('appliance_id', {}),
+                          label_maps.get('appliance_category', {}))
+        return np.array(rows, dtype=np.float32)
     except Exception as e:
         raise ValueError(f"Error encoding features: {str(e)}")
 
+def scale_features(features):
+    """StandardScaler transform fused in place on the float32 feature matrix"""
+    np.subtract(features, scaler_mean, out=features)
+    np.divide(features, scaler_scale, out=features)
+    return features
+
+def model_predict(features_scaled):
+    """Predict via ONNX Runtime when exported, else with the scikit-learn model"""
+    if onnx_model is not None:
+        return onnx_model.predict(features_scaled)
+    return model.predict(features_scaled)
+
+def encode_input(request: PredictionRequest):
+    """Encode categorical features"""
+    return build_matrix([request])
+
+def predict_queued(requests: List[PredictionRequest]) -> List[Any]:
+    """Predict a micro-batch of queued requests with a single model call"""
+    return list(model_predict(scale_features(build_matrix(requests))))
+
+# Model calls run on one dedicated thread: the event loop stays free to accept
+# (and batch) requests, and predict calls never contend with each other
+predict_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+
+async def run_prediction(fn, *args):
+    """Run a CPU-bound model call on the predict thread"""
+    return await asyncio.get_running_loop().run_in_executor(predict_executor, fn, *args)
+
+prediction_batcher = MicroBatcher(predict_queued, executor=predict_executor, cache_size=CACHE_SIZE)
+
+def score_predictions(predictions, power_max, power_reading):
+    """Vectorized non-negative clamp, confidence (0-100) and CV-based risk level"""
+    predicted_disparity = np.maximum(predictions, 0)
+    confidence = np.clip(100 * (1 - np.abs(predicted_disparity / (power_max + 1))), 0, 100)
+    cv = np.divide(predicted_disparity, power_reading, out=np.zeros_like(predicted_disparity),
+                   where=power_reading > 0) * 100
+    risk_level = np.where(cv > 80, "HIGH", np.where(cv > 40, "MEDIUM", "LOW"))
+    return predicted_disparity, confidence, risk_level
+
 @app.post("/predict", response_model=PredictionResponse, tags=["Predictions"])
 async def predict(request: PredictionRequest):
     """Single prediction endpoint"""
@@ -216,14 +315,11 @@ async def predict(request: PredictionRequest):
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        # Encode input
-        features = encode_input(request)
-        
-        # Scale features
-        features_scaled = scaler.transform(features)
-        
-        # Make prediction
-        prediction = model.predict(features_scaled)[0]
+        # Make prediction (coalesced with concurrent requests)
+        if prediction_batcher.running:
+            prediction = await prediction_batcher.submit(request)
+        else:
+            prediction = (await run_prediction(model_predict, scale_features(encode_input(request))))[0]
         
         # Ensure non-negative
         predicted_disparity = max(0, float(prediction))
@@ -245,7 +341,7 @@ async def predict(request: PredictionRequest):
             predicted_disparity_w=round(predicted_disparity, 2),
             confidence=round(confidence, 2),
             risk_level=risk_level,
-            timestamp=datetime.now().isoformat()
+            timestamp=cached_iso()
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Prediction error: {str(e)}")
@@ -257,45 +353,46 @@ async def batch_predict(batch_request: BatchPredictionRequest):
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        results = []
+        requests = batch_request.predictions
+        # One matrix, one model call for the whole batch
+        predictions = (
+            (await run_prediction(model_predict, scale_features(build_matrix(requests)))).astype(np.float64)
+            if requests else np.empty(0)
+        )
+        power_max = np.fromiter((request.power_max for request in requests),
+                                dtype=np.float64, count=len(requests))
+        power_reading = np.fromiter((request.power_reading for request in requests),
+                                    dtype=np.float64, count=len(requests))
+        predicted_disparity, confidence, risk_level = score_predictions(
+            predictions, power_max, power_reading
+        )
         
-        for request in batch_request.predictions:
-            features = encode_input(request)
-            features_scaled = scaler.transform(features)
-            prediction = model.predict(features_scaled)[0]
-            predicted_disparity = max(0, float(prediction))
-            
-            confidence = min(100, max(0, 100 * (1 - abs(predicted_disparity / (request.power_max + 1)))))
-            cv = (predicted_disparity / request.power_reading * 100) if request.power_reading > 0 else 0
-            
-            if cv > 80:
-                risk_level = "HIGH"
-            elif cv > 40:
-                risk_level = "MEDIUM"
-            else:
-                risk_level = "LOW"
-            
-            results.append({
+        results = [
+            {
                 "appliance_id": request.appliance_id,
-                "predicted_disparity_w": round(predicted_disparity, 2),
-                "confidence": round(confidence, 2),
-                "risk_level": risk_level
-            })
+                "predicted_disparity_w": disparity,
+                "confidence": conf,
+                "risk_level": risk
+            }
+            for request, disparity, conf, risk in zip(
+                requests,
+                np.round(predicted_disparity, 2).tolist(),
+                np.round(confidence, 2).tolist(),
+                risk_level.tolist()
+            )
+        ]
         
         return {
             "count": len(results),
             "predictions": results,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": cached_iso()
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Batch prediction error: {str(e)}")
 
-@app.get("/appliances", tags=["Reference"])
-async def get_appliances():
-    """Get list of known appliances and categories"""
-    if not label_encoders or 'appliance_id' not in label_encoders:
-        return {"appliances": [], "categories": []}
-    
+@lru_cache(maxsize=1)
+def appliance_summary() -> dict:
+    """Known appliances and categories, rebuilt only when the encoders are reloaded"""
     appliances = label_encoders['appliance_id'].classes_.tolist()
     categories = label_encoders['appliance_category'].classes_.tolist() if 'appliance_category' in label_encoders else []
     
@@ -306,6 +403,14 @@ async def get_appliances():
         "total_categories": len(categories)
     }
 
+@app.get("/appliances", tags=["Reference"])
+async def get_appliances():
+    """Get list of known appliances and categories"""
+    if not label_encoders or 'appliance_id' not in label_encoders:
+        return {"appliances": [], "categories": []}
+    
+    return appliance_summary()
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -317,9 +422,12 @@ if __name__ == "__main__":
     print("Health Check: http://localhost:8001/health")
     print("\n" + "="*80 + "\n")
     
+    # Stateless server: scale across cores with worker processes, each
+    # predicting single-threaded
     uvicorn.run(
-        app,
+        "serve_model:app",
         host="0.0.0.0",
         port=8001,
+        workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
         log_level="info"
     )
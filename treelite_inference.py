@@ -0,0 +1,37 @@
+"""
+Treelite Compiled Inference
+Optional ahead-of-time compiled backend for the XGBoost energy model.
+
+export_treelite_model.py turns the booster into native C code and builds it
+into a shared library next to the pickled model. When TL2cgen is installed
+and that library exists, app.py predicts through it instead of walking the
+trees in XGBoost. Otherwise load_treelite_predictor returns None.
+"""
+
+from pathlib import Path
+from typing import Optional
+import numpy as np
+
+try:
+    import tl2cgen
+except ImportError:
+    tl2cgen = None
+
+
+class TreelitePredictor:
+    """predict() wrapper around a compiled tree-ensemble shared library"""
+
+    def __init__(self, predictor):
+        self.predictor = predictor
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        return self.predictor.predict(tl2cgen.DMatrix(X)).ravel()
+
+
+def load_treelite_predictor(path: Path, nthread: Optional[int] = None) -> Optional[TreelitePredictor]:
+    """Load a compiled model library, if available"""
+    if tl2cgen is None or not path.exists():
+        return None
+
+    return TreelitePredictor(tl2cgen.Predictor(path, nthread=nthread))